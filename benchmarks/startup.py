@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Track the startup time of the library and of the grep-like CLI.
+
+Each command is run in a fresh interpreter, the median wall time over
+the runs is reported in milliseconds.
+"""
+
+from argparse import ArgumentParser
+from os.path import abspath, dirname
+from statistics import median
+from subprocess import run, DEVNULL
+from sys import executable
+from tempfile import NamedTemporaryFile
+from time import perf_counter
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+
+def measure(command, runs):
+    timings = []
+    for _ in range(runs):
+        start = perf_counter()
+        run(command, cwd=ROOT, stdout=DEVNULL, check=False)
+        timings.append(perf_counter() - start)
+    return median(timings) * 1000
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-n", "--runs", type=int, default=20, help="Runs per command")
+    args = parser.parse_args()
+
+    with NamedTemporaryFile("w", suffix=".log") as fd:
+        fd.write("lorem ipsum dolor sit amet\n" * 100)
+        fd.flush()
+        commands = {
+            "python": [executable, "-c", "pass"],
+            "import regexp": [executable, "-c", "import regexp"],
+            "regexp.compile": [executable, "-c", "import regexp; regexp.compile('ab*c')"],
+            "cli": [executable, "-m", "regexp", "dolor", fd.name],
+        }
+        for name, command in commands.items():
+            print("{:<16} {:7.1f} ms".format(name, measure(command, args.runs)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,46 @@
-from .compile import compile
-from .pattern import IGNORE_CASE
+import sys
+from types import ModuleType
+
+# Public names and the submodule defining them, the submodules are
+# only imported on first access to keep ``import regexp`` cheap.
+_exports = {
+    "compile": "compile",
+    "compile_many": "compile",
+    "compile_fuzzy": "compile",
+    "intern": "compile",
+    "prune": "compile",
+    "IGNORE_CASE": "pattern",
+    "Lexer": "lexer",
+    "PatternSet": "patternset",
+    "Workload": "workload",
+}
+
+__all__ = list(_exports)
+
+
+class _Package(ModuleType):
+    def __setattr__(self, name, value):
+        # Importing the compile submodule binds it as regexp.compile,
+        # it must not shadow the compile function.
+        if not (name == "compile" and isinstance(value, ModuleType)):
+            super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def __getattr__(name):
+    module_name = _exports.get(name)
+    if module_name is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    # Not importlib.import_module, importing importlib is not free
+    __import__(__name__ + "." + module_name)
+    module = sys.modules[__name__ + "." + module_name]
+    for export, origin in _exports.items():
+        if origin == module_name:
+            globals()[export] = getattr(module, export)
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 
 from argparse import ArgumentParser
-from functools import partial
-from os.path import isfile
-from string import ascii_uppercase
-from sys import exit as sys_exit
+from collections import deque
+from itertools import islice
+from locale import getpreferredencoding
+from sys import exit as sys_exit, stderr, stdout
 from .automatons import DCMFA, DCFA, DFA, NFA
+from .files import CHUNKED, open_text, read_errors, scan_path, walk
+from .parallel import CHUNK_SIZE, scan_file
 from .pattern import IGNORE_CASE, expand
 
 parser = ArgumentParser()
@@ -19,31 +21,218 @@ parser.add_argument("-v", "--verbose", dest="verbose", action="store_const", con
                     help="Debug mode, print generated automaton")
 parser.add_argument("-i", "--ignore-case", action="store_const", const=IGNORE_CASE, default=0,
                     help="Ignore case distinctions")
+parser.add_argument("-c", "--count", action="store_const", const=True, default=False,
+                    help="Only print a count of matching lines per file")
+parser.add_argument("-l", "--files-with-matches", action="store_const", const=True, default=False,
+                    help="Only print the name of the files containing matches")
+parser.add_argument("-L", "--files-without-match", action="store_const", const=True, default=False,
+                    help="Only print the name of the files containing no match")
+parser.add_argument("-m", "--max-count", type=int, default=None, metavar="NUM",
+                    help="Stop reading a file after NUM matching lines")
+parser.add_argument("-o", "--only-matching", action="store_const", const=True, default=False,
+                    help="Only print the matched parts of the matching lines")
+parser.add_argument("--max-errors", type=int, default=None, metavar="NUM",
+                    help="Approximate search of the regexp as a plain word, "
+                         "allowing up to NUM edits")
+parser.add_argument("-j", "--jobs", type=int, default=None, metavar="NUM",
+                    help="Scan the files across NUM worker processes, "
+                         "large files are scanned by chunks")
+parser.add_argument("-r", "--recursive", action="store_const", const=True, default=False,
+                    help="Search the files of the directories, recursively")
+parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                    help="Only search the files whose name matches GLOB")
+parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                    help="Skip the files whose name matches GLOB")
 args = parser.parse_args()
 
-if not args.fullmatch:
+pattern = args.regexp
+if not args.fullmatch and args.max_errors is None:
     if not args.regexp.startswith("Σ*"):
         args.regexp = "Σ*%s" % args.regexp
     if not args.regexp.endswith("Σ*"):
         args.regexp = "%sΣ*" % args.regexp
 
-automaton = args.regexp
-print(expand(automaton))
-for construct in (partial(NFA.from_extended_pattern, flags=args.ignore_case), DFA.from_ndfa, DCFA.from_dfa, DCMFA.from_dcfa):
-    automaton = construct(automaton)
-    if args.verbose:
-        print(automaton.__doc__.strip().splitlines()[0])
-        automaton.print_mesh()
-        print()
 
-found = False
-for filepath in filter(isfile, args.files):
-    with open(filepath) as fd:
-        for lineno, line in enumerate(fd.readlines()):
-            if automaton.match(line[:-1]):
-                found = True
-                if not args.quiet:
-                    print(line, end="")
+def show(automaton):
+    print(automaton.__doc__.strip().splitlines()[0])
+    automaton.print_mesh()
+    print()
+
+
+def build_nfa(substring):
+    if args.max_errors is not None:
+        return NFA.from_levenshtein(pattern, args.max_errors, args.ignore_case, substring)
+    return NFA.from_extended_pattern(args.regexp if substring else pattern, args.ignore_case)
+
+
+# Only the intermediate automatons are needed to debug
+automaton = build_nfa(substring=not args.fullmatch)
+if args.verbose:
+    if args.max_errors is None:
+        print(expand(args.regexp))
+    show(automaton)
+    stats = []
+    automaton = automaton.simplify(stats)
+    for name, nodes, transitions in stats:
+        print("{}: {} nodes, {} transitions".format(name, nodes, transitions))
+    print()
+    show(automaton)
+    for construct in (DFA.from_ndfa, DCFA.from_dfa, DCMFA.from_dcfa):
+        automaton = construct(automaton)
+        show(automaton)
+else:
+    automaton = DCMFA.from_ndfa(automaton)
+
+if args.only_matching and not args.fullmatch:
+    # Unwrapped automaton to locate the matched parts inside the lines
+    search = DCMFA.from_ndfa(build_nfa(substring=False))._searcher()
+
+
+def spans(line):
+    """Leftmost longest non-empty matches of the pattern in the line"""
+    if args.fullmatch:
+        yield line
+        return
+    for start, end in search(line):
+        yield line[start:end]
+
+
+encoding = getpreferredencoding(False)
+output = []
+
+
+def write(*texts):
+    """Buffer the output, flush it by batches on stdout"""
+    output.extend(texts)
+    if len(output) >= 1024:
+        flush()
+
+
+def flush():
+    stdout.flush()
+    stdout.buffer.write("".join(output).encode(encoding, "surrogateescape"))
+    output.clear()
+
+
+max_count = 1 if args.quiet or args.files_with_matches or args.files_without_match else args.max_count
+files = walk(args.files, args.recursive, args.include, args.exclude)
+
 
-sys_exit(not found)
+errors = False
+
+
+def report(filepath, exc):
+    """Warn about a file that cannot be read, the other files are still searched"""
+    global errors
+    errors = True
+    flush()
+    stdout.flush()
+    print("regexp: {}: {}".format(filepath, getattr(exc, "strerror", None) or exc), file=stderr)
+
+
+def checked(filepath, lines):
+    """Forward the lines, stop on a read error and report it"""
+    try:
+        yield from lines
+    except read_errors() as exc:
+        report(filepath, exc)
+
+
+def matching_lines(filepath):
+    """
+    Iterate over the lines of the file matching the pattern, None for a
+    binary file or a file that cannot be opened
+    """
+    try:
+        fd = open_text(filepath, skip_binary=True)
+    except read_errors() as exc:
+        report(filepath, exc)
+        return None
+    if fd is None:
+        return None
+    return islice(checked(filepath, read_lines(fd)), max_count)
+
+
+def read_lines(fd):
+    with fd:
+        yield from automaton.scan_stream(fd)
+
+
+def scanned(files):
+    """
+    Yield the files along their matching lines, in order.
+
+    With -j, the files are sent to a pool of workers as they are found
+    by the walk, a window of them is scanned ahead. The workers send
+    the large plain files back, they are scanned by chunks across the
+    same pool instead.
+    """
+    if not args.jobs:
+        for filepath in files:
+            yield filepath, matching_lines(filepath)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    table = automaton.to_table()
+    with ProcessPoolExecutor(args.jobs) as executor:
+        window = deque()
+        try:
+            for filepath in files:
+                window.append((filepath, executor.submit(
+                    scan_path, automaton.__class__, table, automaton.flags, filepath,
+                    max_count, CHUNK_SIZE)))
+                while len(window) > 2 * args.jobs:
+                    yield settle(executor, *window.popleft())
+            while window:
+                yield settle(executor, *window.popleft())
+        finally:
+            # Stopped early, e.g. by -q, drop the files not scanned yet
+            for _, future in window:
+                future.cancel()
+
+
+def settle(executor, filepath, future):
+    try:
+        lines = future.result()
+    except read_errors() as exc:
+        report(filepath, exc)
+        return filepath, None
+    if lines == CHUNKED:
+        lines = islice(checked(filepath, scan_file(
+            automaton, filepath, args.jobs, executor=executor)), max_count)
+    return filepath, lines
+
+
+found = False
+many = args.recursive or len(args.files) > 1
+for filepath, lines in scanned(files):
+    if lines is None:
+        continue
+    lines = iter(lines)
+    if args.quiet:
+        found = found or next(lines, None) is not None
+        if found:
+            break
+    elif args.files_with_matches:
+        if next(lines, None) is not None:
+            found = True
+            write(filepath, "\n")
+    elif args.files_without_match:
+        if next(lines, None) is None:
+            found = True
+            write(filepath, "\n")
+    elif args.count:
+        count = sum(1 for _ in lines)
+        found = found or bool(count)
+        if many:
+            write(filepath, ":")
+        write(str(count), "\n")
+    else:
+        for line in lines:
+            found = True
+            for text in (spans(line) if args.only_matching else (line,)):
+                write(text, "\n")
+flush()
 
+# As grep, an error wins over the matches unless -q found one
+sys_exit(2 if errors and not (args.quiet and found) else not found)
@@ -4,27 +4,122 @@ strings of symbols.
 """
 
 
+from __future__ import annotations
+
 from collections import defaultdict, OrderedDict
 from contextlib import redirect_stdout
 from io import StringIO
 from functools import partial
-from typing import Set
+from itertools import chain, islice
+from typing import (
+    TYPE_CHECKING, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, TextIO,
+    Tuple, Union)
 
 from .char import SIGMA, Character
-from .nodes import Node, NDN, DN, trap_node
-from .pattern import parse, expand
+from .nodes import Node, NDN, DN, make_trap_node, is_trap_node, is_accept_node
+from .pattern import IGNORE_CASE, parse, expand, literals, _expand
+
+# The other submodules are imported where they are used, most programs
+# only need a few of them
+if TYPE_CHECKING:
+    from .profiling import Profile
+    from .simplify import Stats
+
+
+BLOCK_SIZE = 1 << 16
+
+MAX_EXITS = 3
+
+Replacement = Union[str, Callable[[str], str]]
+
+
+def _blocks(stream: TextIO, size: int) -> Iterator[str]:
+    """
+    Read the stream by blocks of ``size`` characters, yield buffers of
+    complete lines, only the last buffer may miss its final ``\n``.
+    A line longer than a block is gathered piece by piece and joined
+    once its end is read.
+    """
+    pending = []
+    while True:
+        block = stream.read(size)
+        if not block:
+            break
+        cut = block.rfind("\n") + 1
+        if not cut:
+            pending.append(block)
+            continue
+        pending.append(block[:cut])
+        yield "".join(pending)
+        pending = [block[cut:]]
+    rest = "".join(pending)
+    if rest:
+        yield rest
+
+
+def _lines(stream: TextIO, size: int) -> Iterator[Tuple[str, str]]:
+    """
+    Read the stream by blocks, yield its lines and their end, either
+    ``"\n"`` or ``""`` for a last line missing its ``\n``.
+    """
+    for buffer in _blocks(stream, size):
+        start = 0
+        end = buffer.find("\n")
+        while end != -1:
+            yield buffer[start:end], "\n"
+            start = end + 1
+            end = buffer.find("\n", start)
+        if start < len(buffer):
+            yield buffer[start:], ""
 
 
 class FA:
     """Abstract Finite Automaton"""
 
-    def __init__(self, initial_node: Node):
-        """Create an automaton using the initial_node as entry point"""
+    #: Kind of matching engine, see :func:`~regexp.compile`
+    engine = None
+    _dead_node = None
+
+    def __init__(self, initial_node: Node, flags: int=0):
+        """
+        Create an automaton using the initial_node as entry point
+
+        :param flags: the :func:`~regexp.pattern.parse` flags the nodes
+            were created with.
+
+        The nodes are numbered in place, they must not be shared with
+        another automaton.
+        """
         self.initial_node = initial_node
+        self.flags = flags
+        self.nodes = self._number_nodes()
+
+    def _fold(self, string: str) -> str:
+        """Fold the case of the string when the automaton ignores case"""
+        if self.flags & IGNORE_CASE:
+            from .casefold import CASEFOLD
+            return string.translate(CASEFOLD)
+        return string
+
+    def _number_nodes(self) -> List[Node]:
+        """
+        Gather the nodes reachable from the initial node in breadth
+        first order and give them dense identifiers starting at 0.
+        """
+        nodes = [self.initial_node]
+        seen = {self.initial_node}
+        for node in nodes:
+            for target in node.targets():
+                if target not in seen:
+                    seen.add(target)
+                    nodes.append(target)
+        for id_, node in enumerate(nodes):
+            node.id = id_
+        return nodes
 
     @property
     def id(self) -> int:
-        """Automaton unique identifier"""
+        """Identifier of the initial node"""
         return self.initial_node.id
 
     @property
@@ -50,13 +145,174 @@ class FA:
         """
         raise NotImplementedError("abstract method")
 
-    def print_mesh(self) -> None:
-        """Pretty print the current automaton"""
+    def _deterministic_node(self) -> Node:
+        """
+        Get the initial node of a deterministic automaton accepting the
+        same strings as :meth:`match`
+        """
+        return self.initial_node
+
+    def _product(self, other: "FA") -> Iterator[Tuple[bool, bool]]:
+        """
+        Walk the product of the deterministic versions of both
+        automatons, yield whether each automaton is final for every
+        reachable pair of nodes. A missing transition is read as a
+        transition to a non-final trap node, ``None``.
+        """
+        if self.flags != other.flags:
+            raise ValueError("Cannot compare automatons created with different flags")
+        start = (self._deterministic_node(), other._deterministic_node())
+        seen = {start}
+        stack = [start]
+        while stack:
+            pair = stack.pop()
+            yield tuple(node is not None and node.is_final for node in pair)
+            alphabet = {SIGMA}
+            for node in pair:
+                if node is not None:
+                    alphabet.update(node.transitions)
+            for char in alphabet:
+                target = tuple(node and node.read(char) for node in pair)
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+
+    def equivalent(self, other: "FA") -> bool:
+        """Accept or reject the same strings as the other automaton"""
+        return all(left == right for left, right in self._product(other))
+
+    def is_subset_of(self, other: "FA") -> bool:
+        """Accept only strings the other automaton accepts too"""
+        return all(right or not left for left, right in self._product(other))
+
+    def scan_lines(self, buffer: str) -> Iterator[Tuple[int, int]]:
+        r"""
+        Match every line of the buffer, lines are delimited by ``\n``.
+
+        :returns: the ``(start, end)`` offsets of the matching lines,
+            the end offset excludes the ``\n``.
+        """
+        raise NotImplementedError("abstract method")
+
+    def scan_stream(self, stream: TextIO, size: int=BLOCK_SIZE) -> Iterator[str]:
+        """
+        Match every line of a text stream, the stream is read by blocks
+        of ``size`` characters and only as long as the caller consumes
+        the iterator.
+
+        :returns: the matching lines, without their ``\\n``.
+        """
+        for buffer in _blocks(stream, size):
+            for start, end in self.scan_lines(buffer):
+                yield buffer[start:end]
+
+    def finditer(self, string: str) -> Iterator[Tuple[int, int]]:
+        """
+        Find the non-overlapping non-empty matches in the string,
+        leftmost first and longest first.
+
+        :returns: the ``(start, end)`` offsets of the matches.
+        """
+        raise NotImplementedError("abstract method")
+
+    def _searcher(self) -> Callable[[str], Iterator[Tuple[int, int]]]:
+        """Get a :meth:`finditer` function to call on many strings"""
+        return self.finditer
+
+    @staticmethod
+    def _substitute(repl: Replacement, string: str, spans: Iterable[Tuple[int, int]],
+                    count: int=0) -> Iterator[str]:
+        """Yield the pieces of the string with the spans replaced"""
+        position = 0
+        for start, end in islice(spans, count or None):
+            yield string[position:start]
+            yield repl if isinstance(repl, str) else repl(string[start:end])
+            position = end
+        yield string[position:]
+
+    def sub(self, repl: Replacement, string: str, count: int=0) -> str:
+        """
+        Replace the matches found by :meth:`finditer` in the string.
+
+        :param repl: the replacement string, taken as-is, or a function
+            called with the matched text returning the replacement.
+        :param count: maximum number of matches to replace, all of them
+            when 0.
+        """
+        return self.subn(repl, string, count)[0]
+
+    def subn(self, repl: Replacement, string: str, count: int=0) -> Tuple[str, int]:
+        """Same as :meth:`sub`, also return the number of replacements"""
+        spans = list(islice(self.finditer(string), count or None))
+        return "".join(self._substitute(repl, string, spans)), len(spans)
+
+    def split(self, string: str, maxsplit: int=0) -> List[str]:
+        """
+        Split the string around the matches found by :meth:`finditer`.
+
+        :param maxsplit: maximum number of splits, all of them when 0.
+        """
+        pieces = []
+        position = 0
+        for start, end in islice(self.finditer(string), maxsplit or None):
+            pieces.append(string[position:start])
+            position = end
+        pieces.append(string[position:])
+        return pieces
+
+    def sub_stream(self, repl: Replacement, source: TextIO, destination: TextIO,
+                   count: int=0, size: int=BLOCK_SIZE) -> int:
+        """
+        Streaming :meth:`sub`, read the source by blocks of ``size``
+        characters and write the result to the destination as it goes.
+        The source is processed line by line, matches do not span
+        lines.
+
+        :returns: the number of replacements.
+        """
+        search = self._searcher()
+        replaced = 0
+        for line, newline in _lines(source, size):
+            if count and replaced == count:
+                destination.write(line + newline)
+                continue
+            spans = list(islice(search(line), count - replaced if count else None))
+            replaced += len(spans)
+            destination.write("".join(chain(self._substitute(repl, line, spans), newline)))
+        return replaced
+
+    def split_stream(self, source: TextIO, size: int=BLOCK_SIZE) -> Iterator[str]:
+        """
+        Streaming :meth:`split`, read the source by blocks of ``size``
+        characters and yield the pieces as they are completed. The
+        source is processed line by line, matches do not span lines.
+        """
+        search = self._searcher()
+        piece = []
+        for line, newline in _lines(source, size):
+            position = 0
+            for start, end in search(line):
+                piece.append(line[position:start])
+                yield "".join(piece)
+                piece = []
+                position = end
+            piece.append(line[position:])
+            piece.append(newline)
+        yield "".join(piece)
+
+    def print_mesh(self, profile: Optional["Profile"]=None) -> None:
+        """
+        Pretty print the current automaton
+
+        :param profile: a :class:`~regexp.profiling.Profile` of the
+            automaton, each transition is prefixed with the number of
+            visits of its source node and their share of all the visits.
+        """
         buffer_ = StringIO()
 
         # Feed the buffer with the tree
         with redirect_stdout(buffer_):
-            print(" " * len(str(Node.count - 1)), "-->", self.initial_node)
+            print(" " * len(str(len(self.nodes) - 1)), "-->", self.initial_node)
             seen = set()
             show = {self.initial_node}
             while show:
@@ -64,10 +320,7 @@ class FA:
                 for node in show:
                     node.print_transitions()
                     seen.add(node)
-                    if isinstance(self, DFA):
-                        next_nodes.update(node.transitions.values())
-                    else:
-                        next_nodes.update(*node.transitions.values())
+                    next_nodes.update(node.targets())
                 show = next_nodes - seen
 
         # Pretty print the tree by sorting nodes and
@@ -78,14 +331,59 @@ class FA:
             if line.endswith("-->"):
                 ends.append(line)
                 lines[idx] = None
-        for line in sorted(filter(bool, lines)):
-            print(line)
-        for line in sorted(ends):
-            print(line)
+        lines = sorted(filter(bool, lines), key=_mesh_order) + sorted(ends, key=_mesh_order)
+        if profile is None:
+            for line in lines:
+                print(line)
+            return
+
+        total = sum(profile.visits) or 1
+        width = len(str(max(profile.visits, default=0)))
+        for line in lines:
+            if line.startswith("("):
+                visits = profile.visits[int(line[1:line.index(")")])]
+                print("{:>{}} {:>5.1%}".format(visits, width, visits / total), line)
+            else:
+                print(" " * (width + 6), line)
 
     def __str__(self):
         return "<{} {} on {}>".format(self.__class__.__name__, self.id, self.initial_node)
 
+
+def _mesh_order(line: str) -> Tuple[int, int, str]:
+    """Sort key of a print_mesh line, by source then target node id"""
+    line = line.rstrip(" ->")
+    if not line.startswith("("):
+        return -1, -1, line
+    source = int(line[1:line.index(")")])
+    target = int(line[line.rindex("(") + 1:-1])
+    return source, target, line
+
+
+class _Row(dict):
+    """
+    Transition row of a deterministic node, map a character to the row
+    of the target node. Characters falling back on the Σ transition are
+    cached on first read.
+
+    When the node loops on itself for Σ and leaves on at most
+    :data:`MAX_EXITS` characters, :attr:`exits` holds those characters
+    so the readers can jump to the next of them using ``str.find``.
+    """
+
+    __slots__ = ("node", "default", "exits")
+
+    def __init__(self, node: Node):
+        super().__init__()
+        self.node = node
+        self.default = None
+        self.exits = None
+
+    def __missing__(self, char: str) -> "_Row":
+        self[char] = self.default
+        return self.default
+
+
 class NFA(FA):
     """
     Non Deterministic Finite Automaton
@@ -98,15 +396,17 @@ class NFA(FA):
     expression and a NFA but they are inefficient in term of matching.
     """
 
+    engine = "nfa"
+
     def match(self, string: str) -> bool:
         new_nodes = {self.initial_node}
         self._expand(new_nodes)
-        for char in string:
+        for char in self._fold(string):
             old_nodes = new_nodes
             new_nodes = set()
             for node in old_nodes:
-                new_nodes |= node.read(char)
-                new_nodes |= node.read(SIGMA)
+                new_nodes.update(node.read(char))
+                new_nodes.update(node.read(SIGMA))
             self._expand(new_nodes)
             if not new_nodes:
                 return False
@@ -118,6 +418,19 @@ class NFA(FA):
     def read_lazy(self, string: str) -> int:
         raise NotImplementedError()
 
+    def _deterministic_node(self) -> Node:
+        return DFA.from_ndfa(self).initial_node
+
+    def simplify(self, stats: Optional["Stats"]=None) -> "NFA":
+        """
+        Simplify a copy of the automaton, see :mod:`regexp.simplify`
+
+        :param stats: a list extended with the size of the automaton
+            before and after each pass.
+        """
+        from .simplify import simplify
+        return self.__class__(simplify(self.initial_node, stats=stats), self.flags)
+
     @staticmethod
     def _expand(nodes: Set[NDN]) -> None:
         """
@@ -128,7 +441,7 @@ class NFA(FA):
         while True:
             next_nodes = set()
             for node in new_nodes:
-                next_nodes.update(node.read(""))
+                next_nodes.update(node.epsilons)
             new_nodes = next_nodes - nodes
             if not new_nodes:
                 break
@@ -137,12 +450,22 @@ class NFA(FA):
     @classmethod
     def from_pattern(cls, pattern: str, flags: int) -> "NFA":
         """Create a NFA out of a regexp pattern"""
-        return cls(parse(pattern, flags=0))
+        return cls(parse(pattern, flags), flags)
 
     @classmethod
     def from_extended_pattern(cls, pattern: str, flags: int) -> "NFA":
         return cls.from_pattern(expand(pattern), flags)
 
+    @classmethod
+    def from_levenshtein(cls, word: str, max_edits: int, flags: int,
+                         substring: bool=False) -> "NFA":
+        """
+        Create a NFA accepting the strings within ``max_edits`` edits
+        of the word, see :func:`~regexp.fuzzy.levenshtein`
+        """
+        from .fuzzy import levenshtein
+        return cls(levenshtein(word, max_edits, flags, substring), flags)
+
 
 class DFA(FA):
     """
@@ -154,30 +477,73 @@ class DFA(FA):
 
     As they are deterministic, they provide an efficiant
     :func:`<regexp.automatons.DFA.match>` method.
+
+    Reading stops early as soon as the automaton enters its *dead node*
+    (reject-forever) or its *accept node* (a final node looping on
+    itself for the entire alphabet, accept-forever).
     """
 
-    @property
-    def _dead_node(self):
-        return None
+    engine = "dfa"
+
+    def __init__(self, initial_node: Node, flags: int=0):
+        super().__init__(initial_node, flags)
+        self._accept_node = next(filter(is_accept_node, self.nodes), None)
+
+    def start_profiling(self) -> "Profile":
+        """
+        Instrument :meth:`match` and :meth:`read_greedy` of this
+        automaton, return the :class:`~regexp.profiling.Profile` they
+        fill in. The instrumented methods are set on the instance, the
+        other automatons and this one once :meth:`stop_profiling` is
+        called run the uninstrumented methods.
+
+        Subclasses overriding one of those methods, such as
+        :meth:`TDFA.match`, keep their own uninstrumented version.
+
+        The automatons returned by :func:`~regexp.compile` are
+        :func:`interned <regexp.compile.intern>` and shared by every
+        equivalent pattern, profile a copy, ``copy.copy(automaton)``,
+        to keep the other users of the automaton out of the profile.
+        """
+        from . import profiling
+        self.profile = profiling.Profile(len(self.nodes))
+        for name in ("match", "read_greedy"):
+            if getattr(type(self), name) is getattr(DFA, name):
+                setattr(self, name, partial(getattr(profiling, name), self))
+        return self.profile
+
+    def stop_profiling(self) -> "Profile":
+        """Restore the uninstrumented methods, return the profile"""
+        for name in ("match", "read_greedy"):
+            self.__dict__.pop(name, None)
+        return self.__dict__.pop("profile")
 
     def match(self, string: str) -> bool:
         node = self.initial_node
-        for letter in string:
+        if node is self._accept_node:
+            return True
+        for letter in self._fold(string):
             node = node.read(letter)
             if node is self._dead_node:
                 return False
+            if node is self._accept_node:
+                return True
         return node.is_final
 
     def read_greedy(self, string: str) -> int:
         node = self.initial_node
+        if node is self._accept_node:
+            return len(string)
         length = 0
         last_final_node = 0
 
-        for letter in string:
+        for letter in self._fold(string):
             node = node.read(letter)
             if node is self._dead_node:
                 break
             length += 1
+            if node is self._accept_node:
+                return len(string)
             if node.is_final:
                 last_final_node = length
         return last_final_node
@@ -185,13 +551,248 @@ class DFA(FA):
     def read_lazy(self, string: str) -> int:
         node = self.initial_node
         length = 0
-        for letter in string:
+        for letter in self._fold(string):
             node = node.read(letter)
             if node is self._dead_node:
                 return 0
             length += 1
             if node.is_final:
                 return length
+        return 0
+
+    def _complete(self) -> "DCFA":
+        """Get this automaton, or a completed copy when it is not a DCFA"""
+        if isinstance(self, DCFA):
+            return self
+        return DCFA.from_dfa(self)
+
+    def _rows(self) -> Dict[Node, "_Row"]:
+        """Build a :class:`_Row` for every node of the automaton"""
+        rows = {node: _Row(node) for node in self.nodes}
+        for node, row in rows.items():
+            row.default = rows.get(node.transitions.get(SIGMA))
+            for char, target in node.transitions.items():
+                if char is not SIGMA:
+                    row[char] = rows[target]
+            if row.default is row:
+                exits = tuple(char for char, target in row.items() if target is not row)
+                if len(exits) <= MAX_EXITS:
+                    row.exits = exits
+        return rows
+
+    def scan_lines(self, buffer: str) -> Iterator[Tuple[int, int]]:
+        r"""
+        Match every line of the buffer in a single pass.
+
+        Lines are delimited using ``str.find`` on ``\n``, the automaton
+        is reset on its initial node for each of them and the line is
+        settled as soon as the dead node or the accept node is reached.
+        In a node looping on itself for all but a few characters, such
+        as the initial node of ``Σ*foo``, the next of those characters is
+        looked up using ``str.find`` instead of reading the characters
+        one by one.
+
+        :returns: the ``(start, end)`` offsets of the matching lines,
+            the end offset excludes the ``\n``.
+        """
+        text = self._fold(buffer)
+        automaton = self._complete()
+        initial = automaton._rows()[automaton.initial_node]
+        find = text.find
+        size = len(text)
+
+        start = 0
+        while start < size:
+            end = find("\n", start)
+            if end == -1:
+                end = size
+            row = initial
+            index = start
+            while index < end:
+                exits = row.exits
+                if exits is None:
+                    # Indexed reads, no str is built for the line
+                    while index < end:
+                        row = row[text[index]]
+                        index += 1
+                        if row.exits is not None:
+                            break
+                elif exits:
+                    # Jump to the next character leaving the row
+                    stop = end
+                    for char in exits:
+                        found = find(char, index, stop)
+                        if found != -1:
+                            stop = found
+                    if stop == end:
+                        break
+                    row = row[text[stop]]
+                    index = stop + 1
+                else:
+                    # Dead node or accept node, the line is settled
+                    break
+            if row.node.is_final:
+                yield start, end
+            start = end + 1
+
+    def finditer(self, string: str) -> Iterator[Tuple[int, int]]:
+        return self._searcher()(string)
+
+    def _searcher(self) -> Callable[[str], Iterator[Tuple[int, int]]]:
+        """
+        Get a :meth:`finditer` function, the automaton rows and the
+        transitions of the backward pass are kept for all the calls.
+
+        The string is first read backward to compute, at every index,
+        the set of the nodes that can still reach a final node reading
+        the rest of the string. A match may only start where the initial
+        node is in the set, and a forward read stops as soon as its node
+        is not in the set anymore, right after the end of the longest
+        match. Each character is read once by the backward pass and at
+        most twice by the forward reads, the search is linear.
+        """
+        rows = self._rows()
+        initial = rows[self.initial_node]
+        accept = rows.get(self._accept_node)
+        all_rows = list(rows.values())
+        finals = frozenset(row.node for row in all_rows if row.node.is_final)
+        # The alive sets of nodes met so far, their ids and their transitions
+        # backward: the set at index i is the set at index i+1 stepped
+        # back by the character at index i
+        alive_sets = [finals]
+        alive_ids = {finals: 0}
+        steps: List[Dict[str, int]] = [{}]
+
+        def step_back(alive_id: int, char: str) -> int:
+            alive = alive_sets[alive_id]
+            previous = finals.union(
+                row.node for row in all_rows
+                if row[char] is not None and row[char].node in alive)
+            previous_id = alive_ids.get(previous)
+            if previous_id is None:
+                previous_id = alive_ids[previous] = len(alive_sets)
+                alive_sets.append(previous)
+                steps.append({})
+            steps[alive_id][char] = previous_id
+            return previous_id
+
+        def finditer(string: str) -> Iterator[Tuple[int, int]]:
+            text = self._fold(string)
+            size = len(text)
+            alive_at = [finals] * (size + 1)
+            starts = bytearray(size)
+            alive_id = 0
+            for index in range(size - 1, -1, -1):
+                char = text[index]
+                previous_id = steps[alive_id].get(char)
+                if previous_id is None:
+                    previous_id = step_back(alive_id, char)
+                alive_id = previous_id
+                alive = alive_at[index] = alive_sets[alive_id]
+                if initial.node in alive:
+                    starts[index] = 1
+
+            find = starts.find
+            position = find(1)
+            while position != -1:
+                if initial is accept:
+                    end = size
+                else:
+                    # Read forward for the longest match
+                    row = initial
+                    end = position
+                    for index in range(position, size):
+                        row = row[text[index]]
+                        if row is accept:
+                            end = size
+                            break
+                        if row is None or row.node not in alive_at[index + 1]:
+                            break
+                        if row.node.is_final:
+                            end = index + 1
+                if end > position:
+                    yield position, end
+                    position = find(1, end)
+                else:
+                    position = find(1, position + 1)
+
+        return finditer
+
+    def scan_file(self, path: str, workers: Optional[int]=None,
+                  size: Optional[int]=None, encoding: Optional[str]=None) -> Iterator[str]:
+        """
+        Match every line of a single file using a pool of worker
+        processes, each scanning a chunk of ``size`` bytes. The lines
+        spanning chunk boundaries are settled by composing per chunk
+        state-to-state mappings, see :mod:`regexp.parallel`.
+
+        The encoding must be UTF-8 or a single byte encoding, it
+        defaults to the locale encoding.
+
+        :param workers: number of worker processes, default to the
+            number of CPUs. With a single worker, chunks are scanned in
+            the current process.
+        :param size: default to :data:`~regexp.parallel.CHUNK_SIZE`.
+        :returns: the matching lines in file order, without their
+            ``\n``.
+        """
+        from .parallel import CHUNK_SIZE, scan_file
+        return scan_file(self._complete(), path, workers, size or CHUNK_SIZE, encoding)
+
+    def to_table(self) -> Tuple[Tuple[bool, Tuple[Tuple[Optional[str], int], ...]], ...]:
+        """
+        Export the automaton as a compact picklable table.
+
+        The table holds one ``(is_final, ((char, target_id), ...))`` row
+        per node, indexed by node id. :data:`~regexp.char.SIGMA` is
+        exported as ``None``.
+        """
+        return tuple(
+            (node.is_final, tuple(
+                (None if char is SIGMA else char, target.id)
+                for char, target in node.transitions.items()))
+            for node in self.nodes)
+
+    def to_canonical_table(self) -> Tuple[Tuple[bool, Tuple[Tuple[Optional[str], int], ...]], ...]:
+        """
+        Export the automaton like :meth:`to_table` in a canonical form.
+
+        Nodes are numbered in breadth first order following the
+        transitions sorted by character, Σ first, and the character
+        transitions targeting the same node as the Σ transition are left
+        out. Two :func:`minimal automatons <regexp.automatons.DCMFA>`
+        accepting the same strings have the same canonical table.
+        """
+        def key(transition):
+            char = transition[0]
+            return (char is not SIGMA, "" if char is SIGMA else char)
+
+        ids = {self.initial_node: 0}
+        nodes = [self.initial_node]
+        table = []
+        for node in nodes:
+            default = node.transitions.get(SIGMA)
+            transitions = sorted(
+                ((char, target) for char, target in node.transitions.items()
+                 if char is SIGMA or target is not default),
+                key=key)
+            for _, target in transitions:
+                if target not in ids:
+                    ids[target] = len(nodes)
+                    nodes.append(target)
+            table.append((node.is_final, tuple(
+                (None if char is SIGMA else char, ids[target])
+                for char, target in transitions)))
+        return tuple(table)
+
+    @classmethod
+    def from_table(cls, table, flags: int=0) -> "DFA":
+        """Rebuild an automaton exported with :meth:`to_table`"""
+        nodes = [DN(is_final) for is_final, _ in table]
+        for node, (_, transitions) in zip(nodes, table):
+            for char, target_id in transitions:
+                node.add(SIGMA if char is None else char, nodes[target_id])
+        return cls(nodes[0], flags)
 
     @classmethod
     def from_pattern(cls, pattern: str, flags: int) -> "DFA":
@@ -225,6 +826,18 @@ class DFA(FA):
         # DA: (5)--a-->(6)--b-->(7)
         #       \-------b------>/
 
+        ndn_to_dn, initial_nodes = cls._powerset(nda.simplify())
+        return cls(ndn_to_dn[initial_nodes], nda.flags)
+
+    @staticmethod
+    def _powerset(nda: NFA) -> Tuple[Dict[FrozenSet[NDN], DN], FrozenSet[NDN]]:
+        """
+        Create a deterministic node for each group of non-deterministic
+        nodes reachable by the powerset construction.
+
+        :returns: the groups mapped to their deterministic node and the
+            initial group.
+        """
         initial_nodes = {nda.initial_node}
         nda._expand(initial_nodes)
         initial_nodes = frozenset(initial_nodes)
@@ -238,13 +851,14 @@ class DFA(FA):
             alphabet = set()
             for node in cur_nodes:
                 alphabet.update(node.transitions.keys())
-            alphabet.difference_update(set([""]))
 
             derivation_table[cur_nodes] = {}
             for char in alphabet:
                 all_targets = set()
                 for node in cur_nodes:
-                    targets = node.read(char)
+                    targets = set(node.read(char))
+                    if char is not SIGMA:
+                        targets.update(node.read(SIGMA))
                     nda._expand(targets)
                     all_targets.update(targets)
                 cell_nodes = frozenset(all_targets)
@@ -266,7 +880,7 @@ class DFA(FA):
             for char in derivation_table[nodes]:
                 dn.add(char, ndn_to_dn[derivation_table[nodes][char]])
 
-        return cls(ndn_to_dn[initial_nodes])
+        return ndn_to_dn, initial_nodes
 
 
 class DCFA(DFA):
@@ -281,9 +895,9 @@ class DCFA(DFA):
     and :func:`Inverted Automatons <regexp.automatons.DCIFA>`.
     """
 
-    @property
-    def _dead_node(self):
-        return trap_node
+    def __init__(self, initial_node: Node, flags: int=0):
+        super().__init__(initial_node, flags)
+        self._dead_node = next(filter(is_trap_node, self.nodes), None)
 
     @classmethod
     def from_pattern(cls, pattern: str, flags: int) -> "DCFA":
@@ -300,19 +914,17 @@ class DCFA(DFA):
         """
         Complete a :func:`Deterministic Automaton <regexp.automatons.DFA>`
 
-        Add a *catch all* transition targeting the
-        :func:`trap node <regexp.nodes.trap_node>` on every node.
+        Add a *catch all* transition targeting a :func:`trap node
+        <regexp.nodes.make_trap_node>` on every node. The nodes are
+        copied, the given automaton is left untouched.
         """
-        dca = cls(da.initial_node)
-        seen = set()
-        nodes = [dca.initial_node]
-        while nodes:
-            node = nodes.pop()
-            new_nodes = set(node.transitions.values()) - seen
-            nodes.extend(new_nodes)
-            seen |= new_nodes
-            node.transitions.setdefault(SIGMA, trap_node)
-        return dca
+        trap_node = make_trap_node()
+        copies = [DN.duplicate(node) for node in da.nodes]
+        for node, copy in zip(da.nodes, copies):
+            for char, target in node.transitions.items():
+                copy.add(char, copies[target.id])
+            copy.transitions.setdefault(SIGMA, trap_node)
+        return cls(copies[0], da.flags)
 
 
 class DCMFA(DCFA):
@@ -347,16 +959,8 @@ class DCMFA(DCFA):
         <https://en.wikipedia.org/wiki/DFA_minimization>`_
         """
 
-        # Gather automaton's nodes
-        dca_nodes = set([dca.initial_node])
-        new_nodes = set([dca.initial_node])
-        while new_nodes:
-            new_nodes_targets = set()
-            for node in new_nodes:
-                new_nodes_targets.update(set(node.transitions.values()))
-            new_nodes = new_nodes_targets - dca_nodes
-            dca_nodes.update(new_nodes)
-        dca_nodes = sorted(list(dca_nodes), key=lambda n: n.id)
+        # Automaton's nodes, ordered by id
+        dca_nodes = dca.nodes
 
         # Gather automaton's alphabet
         # determinism (=order) is important and sigma must be the last
@@ -376,7 +980,7 @@ class DCMFA(DCFA):
             for node in nodes:
                 derivations[node] = nodes[node]
                 for rank, char in enumerate(alphabet):
-                    target = node.transitions.get(char)
+                    target = node.read(char)
                     if target:
                         derivations[node] += nodes[target] * system ** (rank + 1)
 
@@ -406,7 +1010,7 @@ class DCMFA(DCFA):
                     dcma_target = id_to_dcma[dca_to_id[dca_target]]
                     dcma_node.add(char, dcma_target)
 
-        return cls(id_to_dcma[dca_to_id[dca.initial_node]])
+        return cls(id_to_dcma[dca_to_id[dca.initial_node]], dca.flags)
 
 
 class DCIFA(DCFA):
@@ -420,6 +1024,388 @@ class DCIFA(DCFA):
     def match(self, string: str) -> bool:
         return not super().match(string)
 
+    def _deterministic_node(self) -> Node:
+        table = tuple((not is_final, transitions) for is_final, transitions in self.to_table())
+        return DCFA.from_table(table, self.flags).initial_node
+
+
+class Match:
+    """
+    Successful match of a :func:`Tagged Automaton
+    <regexp.automatons.TDFA>`, expose the captured groups.
+    """
+
+    __slots__ = ("string", "_registers")
+
+    def __init__(self, string: str, registers: List[Optional[int]]):
+        self.string = string
+        self._registers = registers
+
+    def span(self, group: int=0) -> Tuple[int, int]:
+        """Start and end of the group, (-1, -1) when it did not match"""
+        if group == 0:
+            return 0, len(self.string)
+        if not 0 < group <= len(self._registers) // 2:
+            raise IndexError("no such group")
+        start = self._registers[2 * group - 2]
+        end = self._registers[2 * group - 1]
+        if start is None or end is None:
+            return -1, -1
+        return start, end
+
+    def group(self, group: int=0) -> Optional[str]:
+        """Substring matched by the group, None when it did not match"""
+        start, end = self.span(group)
+        if start == -1:
+            return None
+        return self.string[start:end]
+
+    def groups(self) -> Tuple[Optional[str], ...]:
+        """Substrings matched by all the groups, from 1 up"""
+        return tuple(map(self.group, range(1, len(self._registers) // 2 + 1)))
+
+    def __repr__(self):
+        return "<{} span={} match={!r}>".format(
+            self.__class__.__name__, self.span(), self.string)
+
+
+class TDFA(DFA):
+    """
+    Tagged Deterministic Finite Automaton
+
+    A TDFA is a DFA whose transitions also update registers holding the
+    positions of the capture tags of the :func:`NFA
+    <regexp.automatons.NFA>`. Sub-matches are extracted in the same
+    single pass as the match itself.
+
+    Each node of the TDFA stands for an ordered tuple of NFA nodes
+    (sorted by priority), the registers of the nth NFA node are
+    ``n * #tags`` up to ``(n + 1) * #tags``. A transition carries the
+    operations building the new registers out of the old ones. When
+    several paths compete, the first one in the NFA order wins: kleene
+    stars are greedy and unions are ordered.
+
+    Tagged DFA theorie is available in `Laurikari's paper
+    <https://laurikari.net/ville/spire2000-tnfa.pdf>`_.
+    """
+
+    CURRENT = -1
+    UNSET = -2
+
+    def __init__(self, initial_node: Node, flags: int=0):
+        super().__init__(initial_node, flags)
+        self.tags = 0
+        self._initial_operations = ()
+        self._operations = {}
+        self._final_slots = {}
+
+    def match(self, string: str) -> Optional[Match]:
+        """Match the string entirely, return the groups on success"""
+        node = self.initial_node
+        registers = [0 if operation == self.CURRENT else None
+                     for operation in self._initial_operations]
+        for position, char in enumerate(self._fold(string), 1):
+            transitions = node.transitions
+            key = char if char in transitions else SIGMA
+            target = transitions.get(key)
+            if target is None:
+                return None
+            operations = self._operations[node][key]
+            if operations is not None:
+                registers = [
+                    registers[op] if op >= 0 else position if op == self.CURRENT else None
+                    for op in operations]
+            node = target
+
+        slot = self._final_slots.get(node)
+        if slot is None:
+            return None
+        return Match(string, registers[slot * self.tags:(slot + 1) * self.tags])
+
+    @classmethod
+    def from_extended_pattern(cls, pattern: str, flags: int) -> "TDFA":
+        """
+        Create a TDFA out of an extended pattern, the groups introduced
+        by the expansion are not captured.
+        """
+        expanded, captures = _expand(pattern)
+        return cls.from_ndfa(NFA(parse(expanded, flags, captures), flags))
+
+    @classmethod
+    def from_ndfa(cls, nda: NFA) -> "TDFA":
+        """
+        Determine a tagged :func:`Non Deterministic Automaton
+        <regexp.automatons.NFA>`.
+        """
+        tags = 1 + max((node.tag for node in nda.nodes if node.tag is not None),
+                       default=-1)
+
+        def closure(sources):
+            """
+            Follow the void transitions out of the (slot, node) sources,
+            keep the nodes that read characters or are final.
+            """
+            nodes = []
+            operations = []
+            seen = set()
+            stack = [(slot, node, frozenset()) for slot, node in reversed(sources)]
+            while stack:
+                slot, node, set_tags = stack.pop()
+                if node in seen:
+                    continue
+                seen.add(node)
+                if node.tag is not None:
+                    set_tags = set_tags | {node.tag}
+                if node.transitions or node.is_final:
+                    nodes.append(node)
+                    operations.extend(
+                        cls.CURRENT if tag in set_tags
+                        else cls.UNSET if slot is None
+                        else slot * tags + tag
+                        for tag in range(tags))
+                stack.extend((slot, target, set_tags)
+                             for target in reversed(list(node.epsilons)))
+            return tuple(nodes), tuple(operations)
+
+        initial_nodes, initial_operations = closure([(None, nda.initial_node)])
+
+        # Create the derivation table, each cell holds the target nodes
+        # and the register operations
+        stack = [initial_nodes]
+        derivation_table = {}
+        while stack:
+            cur_nodes = stack.pop()
+            alphabet = set()
+            for node in cur_nodes:
+                alphabet.update(node.transitions.keys())
+
+            derivation_table[cur_nodes] = {}
+            for char in alphabet:
+                sources = []
+                for slot, node in enumerate(cur_nodes):
+                    targets = node.read(char)
+                    if char is not SIGMA:
+                        targets = chain(targets, node.read(SIGMA))
+                    sources.extend((slot, target) for target in targets)
+                cell_nodes, operations = closure(sources)
+                if not cell_nodes:
+                    continue
+                if operations == tuple(range(len(operations))):
+                    operations = None
+                if cell_nodes not in derivation_table:
+                    stack.append(cell_nodes)
+                derivation_table[cur_nodes][char] = (cell_nodes, operations)
+
+        # Create a new deterministic node for each tuple of
+        # non-deterministic nodes from the derivation table
+        ndn_to_dn = {}
+        final_slots = {}
+        for nodes in derivation_table:
+            dn = DN(any(node.is_final for node in nodes))
+            ndn_to_dn[nodes] = dn
+            if dn.is_final:
+                final_slots[dn] = next(
+                    slot for slot, node in enumerate(nodes) if node.is_final)
+
+        # Link deterministic nodes using the derivation table
+        all_operations = {}
+        for nodes, row in derivation_table.items():
+            dn = ndn_to_dn[nodes]
+            all_operations[dn] = {}
+            for char, (cell_nodes, operations) in row.items():
+                dn.add(char, ndn_to_dn[cell_nodes])
+                all_operations[dn][char] = operations
+
+        tda = cls(ndn_to_dn[initial_nodes], nda.flags)
+        tda.tags = tags
+        tda._initial_operations = initial_operations
+        tda._operations = all_operations
+        tda._final_slots = final_slots
+        return tda
+
+
+class ACA(FA):
+    """
+    Aho-Corasick Automaton
+
+    An ACA matches a set of literal words. It is made of a trie of
+    :func:`Deterministic Nodes <regexp.nodes.DN>`, one final node per
+    word, completed by *failure links*: the failure node of a node is
+    the node of its longest proper suffix in the trie.
+
+    The trie is built in linear time out of the words, where
+    :func:`determinizing <regexp.automatons.DFA.from_ndfa>` the
+    equivalent ``word1|word2|...`` pattern crawls through a huge void
+    transition fan-out.
+
+    Aho-Corasick theorie is available on `wikipedia
+    <https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm>`_
+    """
+
+    engine = "literal"
+
+    def __init__(self, initial_node: Node, flags: int=0):
+        super().__init__(initial_node, flags)
+        root = initial_node
+        self._fail = {root: root}
+        self._depth = {root: 0}
+        # Length of the longest word ending on the node, 0 if none
+        self._longest = {root: 0}
+        for node in self.nodes:
+            for char, child in node.transitions.items():
+                fail = self._fail[node]
+                while fail is not root and char not in fail.transitions:
+                    fail = self._fail[fail]
+                target = fail.transitions.get(char)
+                self._fail[child] = target if target not in (None, child) else root
+                self._depth[child] = self._depth[node] + 1
+                self._longest[child] = (self._depth[child] if child.is_final
+                                        else self._longest[self._fail[child]])
+
+    def match(self, string: str) -> bool:
+        node = self.initial_node
+        for char in self._fold(string):
+            node = node.transitions.get(char)
+            if node is None:
+                return False
+        return node.is_final
+
+    def read_greedy(self, string: str) -> int:
+        node = self.initial_node
+        last_final_node = 0
+        for length, char in enumerate(self._fold(string), 1):
+            node = node.transitions.get(char)
+            if node is None:
+                break
+            if node.is_final:
+                last_final_node = length
+        return last_final_node
+
+    def read_lazy(self, string: str) -> int:
+        node = self.initial_node
+        for length, char in enumerate(self._fold(string), 1):
+            node = node.transitions.get(char)
+            if node is None:
+                return 0
+            if node.is_final:
+                return length
+        return 0
+
+    def finditer(self, string: str) -> Iterator[Tuple[int, int]]:
+        """
+        Find the non-overlapping occurrences of the words, leftmost
+        first and longest first.
+
+        :returns: the ``(start, end)`` offsets of the occurrences.
+        """
+        text = self._fold(string)
+        root = self.initial_node
+        fail = self._fail
+        depth = self._depth
+        longest = self._longest
+
+        pos = 0
+        size = len(text)
+        while pos < size:
+            node = root
+            best = None
+            for end in range(pos + 1, size + 1):
+                char = text[end - 1]
+                while char not in node.transitions and node is not root:
+                    node = fail[node]
+                node = node.transitions.get(char, root)
+                if best and end - depth[node] > best[0]:
+                    # No later occurrence can start sooner
+                    break
+                if longest[node] and (not best or end - longest[node] <= best[0]):
+                    best = (end - longest[node], end)
+            if not best:
+                return
+            yield best
+            pos = best[1]
+
+    def scan_lines(self, buffer: str) -> Iterator[Tuple[int, int]]:
+        r"""
+        Match every line of the buffer against the words by walking the
+        trie, the failure links are not followed.
+
+        :returns: the ``(start, end)`` offsets of the lines equal to a
+            word, the end offset excludes the ``\n``.
+        """
+        text = self._fold(buffer)
+        root = self.initial_node
+        find = text.find
+        size = len(text)
+
+        start = 0
+        while start < size:
+            end = find("\n", start)
+            if end == -1:
+                end = size
+            node = root
+            index = start
+            while node is not None and index < end:
+                node = node.transitions.get(text[index])
+                index += 1
+            if node is not None and node.is_final:
+                yield start, end
+            start = end + 1
+
+    def search(self, string: str) -> Optional[Tuple[int, int]]:
+        """
+        Find the first occurrence of a word, see :meth:`finditer`
+
+        :returns: the ``(start, end)`` offsets of the occurrence.
+        """
+        return next(self.finditer(string), None)
+
+    def to_table(self) -> Tuple[str, ...]:
+        """Export the automaton as its (folded) words"""
+        words = []
+        stack = [(self.initial_node, "")]
+        while stack:
+            node, word = stack.pop()
+            if node.is_final:
+                words.append(word)
+            stack.extend((child, word + char)
+                         for char, child in node.transitions.items())
+        return tuple(words)
+
+    @classmethod
+    def from_table(cls, table, flags: int=0) -> "ACA":
+        """Rebuild an automaton exported with :meth:`to_table`"""
+        return cls.from_words(table, flags)
+
+    @classmethod
+    def from_pattern(cls, pattern: str, flags: int) -> "ACA":
+        """
+        Create an ACA out of a pure literal alternation, see
+        :func:`~regexp.pattern.literals`
+        """
+        words = literals(pattern)
+        if words is None:
+            raise ValueError("Not a literal alternation: {}".format(pattern))
+        return cls.from_words(words, flags)
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], flags: int=0) -> "ACA":
+        """Create an ACA matching any of the given words"""
+        if flags & IGNORE_CASE:
+            from .casefold import CASEFOLD
+        root = DN(is_final=False)
+        for word in words:
+            if flags & IGNORE_CASE:
+                word = word.translate(CASEFOLD)
+            node = root
+            for char in word:
+                child = node.transitions.get(char)
+                if child is None:
+                    child = DN(is_final=False)
+                    node.add(char, child)
+                node = child
+            node.is_final = True
+        return cls(root, flags)
+
 
 FiniteAutomaton = FA
 NonDeterministicFiniteAutomaton = NFA
@@ -427,3 +1413,5 @@ DeterministicFiniteAutomaton = DFA
 DeterministicCompletedFiniteAutomaton = DCFA
 DeterministicCompletedMinimalistFiniteAutomaton = DCMFA
 DeterministicCompletedInvertedFiniteAutomaton = DCIFA
+TaggedDeterministicFiniteAutomaton = TDFA
+AhoCorasickAutomaton = ACA
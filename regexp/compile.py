@@ -1,5 +1,277 @@
-from .automatons import DCMFA
+from os import cpu_count
+from typing import Iterable, List, Optional, Union
+from weakref import WeakValueDictionary
+from .automatons import FA, ACA, DCMFA, DFA, NFA
+from .char import SIGMA
+from .nodes import NDN
+from .pattern import literals
 
-def compile(pattern: str, flags:int=0) -> DCMFA:
-    """Compile the pattern into the most efficient automaton"""
-    return DCMFA.from_pattern(pattern, flags)
+
+# Compiled automatons by class, flags and hash of their canonical form
+_interned = WeakValueDictionary()
+
+
+def _canonical_table(automaton: FA) -> tuple:
+    if isinstance(automaton, ACA):
+        return tuple(sorted(set(automaton.to_table())))
+    return automaton.to_canonical_table()
+
+
+def intern(automaton: FA) -> FA:
+    """
+    Get the interned automaton accepting the same strings as the given
+    one, intern the given one when there is none yet.
+
+    Automatons are compared using their :meth:`canonical form
+    <regexp.automatons.DFA.to_canonical_table>`, only the hash of the
+    form is kept. The interned automatons are weakly referenced, they
+    are dropped once no longer used.
+
+    The interned automatons are shared, they must not be modified.
+    Attributes set on an automaton, such as the instrumented methods of
+    :meth:`~regexp.automatons.DFA.start_profiling`, are seen by every
+    user of an equivalent pattern, set them on a ``copy.copy`` of it.
+    """
+    table = _canonical_table(automaton)
+    key = (automaton.__class__, automaton.flags, hash(table))
+    interned = _interned.setdefault(key, automaton)
+    if interned is not automaton and _canonical_table(interned) != table:
+        # Hash collision, keep both
+        return automaton
+    return interned
+
+
+#: Patterns whose NFA is larger are compiled lazily, see :func:`compile`
+MAX_EAGER_NODES = 1000
+
+#: Number of matches run by NFA simulation before compiling the DFA
+PROMOTE_AFTER = 16
+
+HINTS = (None, "once", "hot")
+
+#: Largest product of automaton sizes for which :func:`prune` checks a
+#: pattern against the union of the other ones
+MAX_UNION_PRODUCT = 1 << 12
+
+
+class PromotingAutomaton:
+    """
+    Match using NFA simulation, which needs no construction at all, and
+    switch to a :func:`minimal automaton <regexp.automatons.DCMFA>`
+    after :data:`PROMOTE_AFTER` matches.
+
+    Only :meth:`match` is simulated, any other attribute access
+    compiles the DFA first and is forwarded to it.
+    """
+
+    def __init__(self, nfa: NFA, promote_after: int=PROMOTE_AFTER):
+        self.nfa = nfa
+        self.flags = nfa.flags
+        self.dfa: Optional[DCMFA] = None
+        self.promote_after = promote_after
+        self.uses = 0
+
+    @property
+    def engine(self) -> str:
+        return "nfa" if self.dfa is None else self.dfa.engine
+
+    def promote(self) -> DCMFA:
+        """Compile the DFA now"""
+        if self.dfa is None:
+            self.dfa = intern(DCMFA.from_ndfa(self.nfa))
+            self.nfa = None
+        return self.dfa
+
+    def match(self, string: str) -> bool:
+        if self.dfa is None:
+            self.uses += 1
+            if self.uses <= self.promote_after:
+                return self.nfa.match(string)
+            self.promote()
+        return self.dfa.match(string)
+
+    def __getattr__(self, name):
+        # Only reached for missing attributes: the special ones looked up
+        # by copy and pickle, and nfa and dfa on an instance being
+        # restored, must not promote
+        if name.startswith("__") or name in ("nfa", "dfa"):
+            raise AttributeError(name)
+        return getattr(self.promote(), name)
+
+    def __repr__(self):
+        return "<{} {} after {} uses>".format(self.__class__.__name__, self.engine, self.uses)
+
+
+def compile(pattern: str, flags: int=0,
+            hint: Optional[str]=None) -> Union[FA, PromotingAutomaton]:
+    """
+    Compile the pattern into the most efficient automaton
+
+    The engine is planned out of the pattern and the hint, the chosen
+    one is given by the ``engine`` attribute of the result:
+
+    * ``"literal"``, pure literals and literal alternations (``foo``,
+      ``foo|bar|baz``) are compiled into an :func:`Aho-Corasick
+      Automaton <regexp.automatons.ACA>`, whatever the hint.
+    * ``"dfa"``, other patterns are compiled into a :func:`minimal
+      automaton <regexp.automatons.DCMFA>`.
+    * ``"nfa"``, the construction of the minimal automaton is deferred
+      by a :class:`PromotingAutomaton`, the first matches are run by NFA
+      simulation.
+
+    The automatons are :func:`interned <intern>`: patterns accepting the
+    same strings, such as ``(a|b)*`` and ``(a*b*)*``, share the same
+    automaton.
+
+    :param hint: ``"hot"`` for patterns used many times, they are
+        compiled into a DFA. ``"once"`` for patterns used a few times,
+        they are simulated. Without hint, patterns whose NFA is larger
+        than :data:`MAX_EAGER_NODES` nodes are simulated, the other ones
+        are compiled.
+    """
+    if hint not in HINTS:
+        raise ValueError("Unknown hint {!r}, use one of {}".format(hint, HINTS))
+
+    words = literals(pattern)
+    if words is not None:
+        return intern(ACA.from_words(words, flags))
+
+    nfa = NFA.from_pattern(pattern, flags)
+    if hint == "once" or (hint is None and len(nfa.nodes) > MAX_EAGER_NODES):
+        return PromotingAutomaton(nfa)
+    return intern(DCMFA.from_ndfa(nfa))
+
+
+def compile_fuzzy(word: str, max_edits: int=1, flags: int=0,
+                  substring: bool=False) -> DCMFA:
+    """
+    Compile a word into the minimal automaton accepting the strings
+    within ``max_edits`` insertions, deletions or substitutions of it.
+
+    :param substring: accept strings containing an approximate match
+        of the word.
+    """
+    return intern(DCMFA.from_ndfa(NFA.from_levenshtein(word, max_edits, flags, substring)))
+
+
+def _compile_table(pattern: str, flags: int):
+    """
+    Worker side of :func:`compile_many`, return the automaton class and
+    table or the error
+    """
+    try:
+        automaton = compile(pattern, flags, hint="hot")
+        return automaton.__class__, automaton.to_table()
+    except Exception as exc:
+        return exc
+
+
+def compile_many(patterns: Iterable[str], flags: int=0,
+                 workers: Optional[int]=None) -> List[Union[FA, Exception]]:
+    """
+    Compile many patterns at once across a pool of worker processes.
+
+    Identical patterns are compiled once and share the same automaton.
+    The result list is aligned on ``patterns``, a pattern that failed to
+    compile is reported by the exception it raised instead of aborting
+    the whole batch.
+
+    :param workers: number of worker processes, default to the number
+        of CPUs. With a single worker, patterns are compiled in the
+        current process.
+    """
+    # Imported here, the process pool is costly to import
+    from concurrent.futures import ProcessPoolExecutor
+
+    patterns = list(patterns)
+    unique = list(dict.fromkeys(patterns))
+    workers = min(workers or cpu_count() or 1, len(unique) or 1)
+
+    if workers == 1:
+        results = [_compile_table(pattern, flags) for pattern in unique]
+    else:
+        chunksize = max(1, len(unique) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                _compile_table, unique, [flags] * len(unique),
+                chunksize=chunksize))
+
+    compiled = {}
+    for pattern, result in zip(unique, results):
+        if isinstance(result, Exception):
+            compiled[pattern] = result
+        else:
+            cls, table = result
+            compiled[pattern] = intern(cls.from_table(table, flags))
+    return [compiled[pattern] for pattern in patterns]
+
+
+def _witness(automaton: DFA) -> Optional[str]:
+    """
+    Find a short string accepted by the automaton, None when it accepts
+    nothing or when no witness was found.
+    """
+    chars = {char for node in automaton.nodes for char in node.transitions}
+    other = chr(max((ord(char) for char in chars if char is not SIGMA), default=0x60) + 1)
+    paths = {automaton.initial_node: ""}
+    nodes = [automaton.initial_node]
+    for node in nodes:
+        if node.is_final:
+            witness = paths[node]
+            return witness if automaton.match(witness) else None
+        for char, target in node.transitions.items():
+            if target not in paths:
+                paths[target] = paths[node] + (other if char is SIGMA else char)
+                nodes.append(target)
+    return None
+
+
+def prune(patterns: Iterable[str], flags: int=0) -> List[str]:
+    """
+    Remove the redundant patterns of a rule set: the patterns whose
+    every match is matched by another pattern of the set.
+
+    Patterns are checked from last to first, out of patterns accepting
+    the same strings the first one is kept. Each pattern is first
+    checked against every other pattern alone, then against the union
+    of the other patterns still in the set. Determinizing a union can
+    take time exponential in the number of patterns, the union is only
+    built when the product of the sizes of the other automatons is at
+    most :data:`MAX_UNION_PRODUCT`, so redundant patterns may remain in
+    large rule sets.
+    """
+    patterns = list(dict.fromkeys(patterns))
+    nfas = [NFA.from_pattern(pattern, flags) for pattern in patterns]
+    dfas = [DCMFA.from_ndfa(nfa) for nfa in nfas]
+    witnesses = [_witness(dfa) for dfa in dfas]
+
+    def covered(index, other):
+        # A string accepted by the pattern but not by the other one
+        # settles most of the checks without walking the product
+        witness = witnesses[index]
+        if witness is not None and not dfas[other].match(witness):
+            return False
+        return dfas[index].is_subset_of(dfas[other])
+
+    kept = list(range(len(patterns)))
+    for index in reversed(range(len(patterns))):
+        if any(covered(index, other) for other in kept if other != index):
+            kept.remove(index)
+
+    for index in reversed(kept[:]):
+        others = [other for other in kept if other != index]
+        if len(others) < 2:
+            continue
+        product = 1
+        for other in others:
+            product *= len(dfas[other].nodes)
+            if product > MAX_UNION_PRODUCT:
+                break
+        if product > MAX_UNION_PRODUCT:
+            continue
+        union = NDN()
+        for other in others:
+            union.add("", NFA.from_pattern(patterns[other], flags).initial_node)
+        if dfas[index].is_subset_of(DFA.from_ndfa(NFA(union, flags))):
+            kept.remove(index)
+    return [patterns[index] for index in kept]
@@ -0,0 +1,180 @@
+"""
+Discovery and opening of the files scanned by the command line, the
+compressed files are decompressed on the fly.
+"""
+
+
+from fnmatch import fnmatch
+from importlib import import_module
+from io import BufferedReader, TextIOWrapper
+from itertools import islice
+from os import fstat, scandir
+from os.path import basename, isdir, isfile
+from sys import modules
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Type, Union
+
+
+#: Size of the buffer between the decompressor and the text decoder
+BUFFER_SIZE = 1 << 20
+
+#: Size of the first block searched for NUL bytes, see :func:`is_binary`
+BINARY_BLOCK_SIZE = 1 << 13
+
+#: Magic bytes of the supported compression formats and the standard
+#: module able to open them
+MAGICS = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "lzma"),
+)
+
+#: Modules of the compression formats raising their own exception on
+#: corrupt data, and the name of that exception
+DECOMPRESSION_ERRORS = (
+    ("zlib", "error"),
+    ("lzma", "LZMAError"),
+)
+
+#: Returned by :func:`scan_path` for the large plain files, they are
+#: better scanned by chunks, see :mod:`regexp.parallel`
+CHUNKED = "chunked"
+
+
+def _module_name(head: bytes) -> Optional[str]:
+    for magic, module_name in MAGICS:
+        if head.startswith(magic):
+            return module_name
+    return None
+
+
+def read_errors() -> Tuple[Type[Exception], ...]:
+    """
+    Get the exceptions raised opening or reading a missing, unreadable
+    or corrupt file. The decompression errors are only looked up in the
+    modules imported so far, no other module can have raised them.
+    """
+    return (OSError, EOFError) + tuple(
+        getattr(modules[module_name], name)
+        for module_name, name in DECOMPRESSION_ERRORS if module_name in modules)
+
+
+def compression(path: str) -> Optional[str]:
+    """
+    Detect the compression of a file using its first bytes, return the
+    name of the module to decompress it or None.
+    """
+    with open(path, "rb") as fd:
+        return _module_name(fd.read(max(len(magic) for magic, _ in MAGICS)))
+
+
+def walk(paths: Iterable[str], recursive: bool=False, include: Sequence[str]=(),
+         exclude: Sequence[str]=()) -> Iterator[str]:
+    """
+    Yield the regular files among the paths, as they are found.
+
+    :param recursive: walk the directories, depth first and in name
+        order, using ``os.scandir``. Symbolic links found while walking
+        are not followed.
+    :param include: glob patterns, when given only the files whose
+        name matches one of them are kept.
+    :param exclude: glob patterns, the files whose name matches one of
+        them are skipped.
+    """
+    def wanted(name):
+        return ((not include or any(fnmatch(name, glob) for glob in include))
+                and not any(fnmatch(name, glob) for glob in exclude))
+
+    for path in paths:
+        if isfile(path):
+            if wanted(basename(path)):
+                yield path
+        elif recursive and isdir(path):
+            stack = [path]
+            while stack:
+                try:
+                    with scandir(stack.pop()) as entries:
+                        entries = sorted(entries, key=lambda entry: entry.name)
+                except OSError:
+                    continue
+                directories = []
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) and wanted(entry.name):
+                        yield entry.path
+                stack.extend(reversed(directories))
+
+
+class _Decompressed(BufferedReader):
+    """Buffered decompressed stream, also closes the compressed file"""
+
+    def __init__(self, decompressor: BinaryIO, file: BinaryIO):
+        super().__init__(decompressor, BUFFER_SIZE)
+        self.file = file
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.file.close()
+
+
+def open_binary(path: str) -> BufferedReader:
+    """
+    Open a file for reading, a compressed file is decompressed. The
+    file is opened once, its first bytes are peeked to detect the
+    compression.
+    """
+    fd = open(path, "rb", buffering=BUFFER_SIZE)
+    module_name = _module_name(fd.peek(max(len(magic) for magic, _ in MAGICS)))
+    if module_name is None:
+        return fd
+    # Imported here, only needed for compressed files
+    return _Decompressed(import_module(module_name).open(fd, "rb"), fd)
+
+
+def _has_nul(fd: BufferedReader) -> bool:
+    return b"\0" in fd.peek(BINARY_BLOCK_SIZE)[:BINARY_BLOCK_SIZE]
+
+
+def is_binary(path: str) -> bool:
+    """Tell whether the first block of the file holds NUL bytes"""
+    with open_binary(path) as fd:
+        return _has_nul(fd)
+
+
+def open_text(path: str, encoding: Optional[str]=None,
+              skip_binary: bool=False) -> Optional[TextIO]:
+    """
+    Open a file for reading in text mode, a compressed file is
+    decompressed in a stream. Undecodable bytes are escaped as
+    surrogates.
+
+    :param skip_binary: return None instead when the first block of
+        the file holds NUL bytes, see :func:`is_binary`.
+    """
+    fd = open_binary(path)
+    if skip_binary and _has_nul(fd):
+        fd.close()
+        return None
+    return TextIOWrapper(fd, encoding=encoding, errors="surrogateescape")
+
+
+def scan_path(cls, table, flags: int, path: str, max_count: Optional[int],
+              chunk_size: Optional[int]=None) -> Union[None, str, List[str]]:
+    """
+    Worker side of the command line ``-j`` option, return the first
+    ``max_count`` matching lines of the file, None for a binary file.
+
+    :param chunk_size: return :data:`CHUNKED` for the plain files of
+        that size or larger instead of scanning them.
+    """
+    fd = open_text(path, skip_binary=True)
+    if fd is None:
+        return None
+    with fd:
+        if (chunk_size is not None and not isinstance(fd.buffer, _Decompressed)
+                and fstat(fd.fileno()).st_size >= chunk_size):
+            return CHUNKED
+        automaton = cls.from_table(table, flags)
+        return list(islice(automaton.scan_stream(fd), max_count))
@@ -0,0 +1,62 @@
+"""
+Approximate matching, build automatons accepting the strings that are
+within a given edit distance of a word.
+"""
+
+
+from .casefold import CASEFOLD
+from .char import SIGMA
+from .nodes import NDN
+from .pattern import IGNORE_CASE
+
+
+def levenshtein(word: str, max_edits: int, flags: int=0, substring: bool=False) -> NDN:
+    r"""
+    Create the Levenshtein automaton of a word, return the resulting
+    starting :func:`Node <regexp.nodes.NDN>`
+
+    The automaton accepts every string that can be turned into the word
+    using at most ``max_edits`` insertions, deletions or substitutions of
+    a single character. The word is taken as-is, no sequence is
+    interpreted.
+
+    The node ``(i, e)`` stands for "the ``i`` first characters of the
+    word have been read using ``e`` edits"::
+
+        (i, e) --word[i]--> (i+1, e)      match
+        (i, e) ----Σ------> (i, e+1)      insertion
+        (i, e) ----Σ------> (i+1, e+1)    substitution
+        (i, e) ----ε------> (i+1, e+1)    deletion
+
+    :param substring: accept strings containing an approximate match,
+        equivalent to surrounding the word with ``Σ*``.
+    """
+    if max_edits < 0:
+        raise ValueError("max_edits must be positive")
+    if flags & IGNORE_CASE:
+        word = word.translate(CASEFOLD)
+
+    size = len(word)
+    grid = [[NDN(is_final=i == size and not substring) for _ in range(max_edits + 1)]
+            for i in range(size + 1)]
+    for i in range(size + 1):
+        for e in range(max_edits + 1):
+            node = grid[i][e]
+            if i < size:
+                node.add(word[i], grid[i + 1][e])
+            if e < max_edits:
+                node.add(SIGMA, grid[i][e + 1])
+                if i < size:
+                    node.add(SIGMA, grid[i + 1][e + 1])
+                    node.add("", grid[i + 1][e + 1])
+
+    start = grid[0][0]
+    if substring:
+        start = NDN()
+        start.add(SIGMA, start)
+        start.add("", grid[0][0])
+        end = NDN(is_final=True)
+        end.add(SIGMA, end)
+        for node in grid[size]:
+            node.add("", end)
+    return start
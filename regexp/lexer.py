@@ -0,0 +1,101 @@
+"""
+Tokenizers generated out of a list of rules.
+"""
+
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .automatons import DFA, NFA
+from .nodes import NDN
+
+
+Token = Tuple[str, int, int]
+
+
+class LexingError(Exception):
+    def __init__(self, string, index):
+        self.string = string
+        self.index = index
+        substr = string[max(index-3, 0):min(index+3, len(string))]
+        super().__init__("No rule matches. At index {}: {}".format(index, substr))
+
+    def __reduce__(self):
+        return self.__class__, (self.string, self.index)
+
+
+class Lexer:
+    """
+    Split strings in tokens according to a list of ``(name, pattern)``
+    rules, the patterns use the :func:`extended grammar
+    <regexp.pattern.expand>`.
+
+    The rules are compiled together into a single :func:`Deterministic
+    Automaton <regexp.automatons.DFA>`, each of its final nodes is
+    labelled with the first rule, in list order, whose pattern it
+    accepts. Tokens are cut by longest match: the automaton reads as
+    long as it can and the token ends on the last final node read, ties
+    are settled by the rule order.
+
+    Rules named ``None`` are matched but their tokens are skipped, use
+    them for blanks and comments.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[Optional[str], str]], flags: int=0):
+        self.rules = list(rules)
+        self.flags = flags
+
+        # Union of the rules, remember which rule each final node ends
+        initial_node = NDN()
+        priorities = {}
+        for priority, (_, pattern) in enumerate(self.rules):
+            nfa = NFA.from_extended_pattern(pattern, flags)
+            initial_node.add("", nfa.initial_node)
+            for node in nfa.nodes:
+                if node.is_final:
+                    priorities[node] = priority
+
+        ndn_to_dn, initial_nodes = DFA._powerset(NFA(initial_node, flags))
+        self.automaton = DFA(ndn_to_dn[initial_nodes], flags)
+
+        #: Rule index of each final node of the automaton, by node id
+        self._node_rules: List[Optional[int]] = [None] * len(self.automaton.nodes)
+        for nodes, dn in ndn_to_dn.items():
+            if dn.is_final:
+                self._node_rules[dn.id] = min(
+                    priorities[node] for node in nodes if node.is_final)
+
+    def tokenize(self, string: str) -> Iterator[Token]:
+        """
+        Read the string from left to right, yield the ``(name, start,
+        end)`` tokens.
+
+        :raises LexingError: when no rule matches a non-empty string at
+            the current index.
+        """
+        text = self.automaton._fold(string)
+        initial_node = self.automaton.initial_node
+        node_rules = self._node_rules
+        size = len(text)
+
+        start = 0
+        while start < size:
+            node = initial_node
+            end = start
+            rule = None
+            for index in range(start, size):
+                node = node.read(text[index])
+                if node is None:
+                    break
+                if node.is_final:
+                    end = index + 1
+                    rule = node_rules[node.id]
+            if end == start:
+                raise LexingError(string, start)
+            name = self.rules[rule][0]
+            if name is not None:
+                yield name, start, end
+            start = end
+
+    def __repr__(self):
+        return "<{} {}>".format(
+            self.__class__.__name__, " ".join(str(name) for name, _ in self.rules))
@@ -1,24 +1,30 @@
 """"""
 
 
-from collections import defaultdict
-from typing import MutableMapping, Set, Any
+from __future__ import annotations
+
+from typing import Dict, Iterable, MutableMapping, Optional, Any
 from .char import SIGMA, Character, char_to_str
 
 
+_NO_NODES = ()
+
+
 class Node:
     """Abstract Node"""
 
-    count = 0
+    __slots__ = ("id", "is_final", "transitions")
+
+    id: Optional[int]
     transitions: MutableMapping[Character, Any]
 
     def __init__(self, is_final: bool):
         self.is_final = is_final
-        self.id = Node.count
-        Node.count += 1
+        # Assigned densely by the owning automaton, see FA.__init__
+        self.id = None
 
     def __str__(self):
-        return ("({:0%dd})" % len(str(self.count - 1))).format(self.id)
+        return "({})".format(self.id)
 
     def __repr__(self):
         return "<{} {} ({})>".format(
@@ -32,36 +38,62 @@ class Node:
     def add(self, char: Character, node: "Node") -> None:
         raise NotImplementedError("abstract method")
 
+    def targets(self) -> Iterable["Node"]:
+        """Iterate over the nodes reachable in one transition"""
+        raise NotImplementedError("abstract method")
+
     def print_transitions(self) -> None:
         raise NotImplementedError("abstract method")
 
     @classmethod
     def duplicate(cls, node):
         """Create a new node with the same is_final state as the given node"""
-        if node is trap_node:
-            return trap_node
         return cls(node.is_final)
 
-    def __hash__(self):
-        return self.id
-
 
 class NDN(Node):
-    """Non Deterministic Node"""
+    """
+    Non Deterministic Node
+
+    Void transitions are kept apart from the character transitions in
+    :attr:`epsilons`. Targets are the keys of dicts: they are kept in
+    insertion order, it gives the priority between the paths, see
+    :class:`~regexp.automatons.TDFA`, and adding one is O(1).
+
+    A node can hold a capture :attr:`tag`, the tag is set each time the
+    node is entered.
+    """
+
+    __slots__ = ("epsilons", "tag")
 
-    transitions: MutableMapping[Character, Set[Node]]
+    transitions: MutableMapping[Character, Dict[Node, None]]
+    epsilons: Dict[Node, None]
+    tag: Optional[int]
 
-    def __init__(self, is_final=False):
+    def __init__(self, is_final=False, tag=None):
         super().__init__(is_final)
-        self.transitions = defaultdict(set)
+        self.transitions = {}
+        self.epsilons = {}
+        self.tag = tag
 
-    def read(self, char: str) -> Set[Node]:
-        return self.transitions.get(char, set())
+    def read(self, char: str) -> Iterable[Node]:
+        if char == "":
+            return self.epsilons
+        return self.transitions.get(char, _NO_NODES)
 
     def add(self, char: Character, node: Node) -> None:
-        self.transitions[char].add(node)
+        targets = self.epsilons if char == "" else self.transitions.setdefault(char, {})
+        targets[node] = None
+
+    def targets(self) -> Iterable[Node]:
+        yield from self.epsilons
+        for nodes in self.transitions.values():
+            yield from nodes
 
     def print_transitions(self) -> None:
+        for node in self.epsilons:
+            print(self, char_to_str(""), node, end="")
+            print(" -->" if node.is_final else "")
         for char, nodes in self.transitions.items():
             for node in nodes:
                 print(self, char_to_str(char), node, end="")
@@ -71,6 +103,8 @@ class NDN(Node):
 class DN(Node):
     """Deterministic Node"""
 
+    __slots__ = ()
+
     transitions: MutableMapping[Character, Node]
 
     def __init__(self, is_final: bool):
@@ -85,14 +119,38 @@ class DN(Node):
             raise ValueError("Cannot have empty transition.")
         self.transitions[char] = node
 
+    def targets(self) -> Iterable[Node]:
+        return self.transitions.values()
+
     def print_transitions(self) -> None:
         for char, node in self.transitions.items():
             print(self, char_to_str(char), node, end="")
             print(" -->" if node.is_final else "")
 
 
-trap_node = DN(is_final=False)
-trap_node.add(SIGMA, trap_node)
+def make_trap_node() -> DN:
+    """
+    Create a non-final node that loops on itself for the entire
+    alphabet, once entered there is no way to reach a final node.
+    """
+    trap = DN(is_final=False)
+    trap.add(SIGMA, trap)
+    return trap
+
+
+def is_trap_node(node: Node) -> bool:
+    """Whether the node is a non-final node only looping on itself"""
+    return (not node.is_final
+            and SIGMA in node.transitions
+            and all(target is node for target in node.transitions.values()))
+
+
+def is_accept_node(node: Node) -> bool:
+    """Whether the node is a final node only looping on itself"""
+    return (node.is_final
+            and SIGMA in node.transitions
+            and all(target is node for target in node.transitions.values()))
+
 
 NonDeterministicNode = NDN
 DeterministicNode = DN
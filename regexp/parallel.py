@@ -0,0 +1,179 @@
+"""
+Chunk-parallel scanning of a single large file.
+
+The file is cut in chunks of bytes scanned by a pool of worker
+processes. A worker cannot know in which state the automaton enters its
+chunk when the chunk starts in the middle of a line, so it reads that
+first piece of line speculatively from every state of the automaton and
+returns the resulting state-to-state mapping. The complete lines of the
+chunk are matched as usual, and the last piece of line is read from the
+initial state. The parent composes the mappings chunk after chunk to
+settle the lines that span chunk boundaries.
+"""
+
+
+from collections import deque
+from locale import getpreferredencoding
+from os import cpu_count
+from os.path import getsize
+from typing import Iterator, List, Optional, Tuple
+
+
+CHUNK_SIZE = 1 << 24
+
+Chunk = Tuple[List[int], str, List[str], Optional[int], str]
+
+
+def transfer(rows: list, text: str) -> List[int]:
+    """
+    Read the text from every row at once, return the id of the row
+    reached from each row id. The rows are indexed by node id.
+
+    The runs reaching the same row are merged, once all of them have
+    converged the rest of the text is read by a single run.
+    """
+    reached = {row.node.id: [row.node.id] for row in rows}
+    size = len(text)
+    position = 0
+    while position < size and len(reached) > 1:
+        char = text[position]
+        position += 1
+        merged = {}
+        for state, origins in reached.items():
+            merged.setdefault(rows[state][char].node.id, []).extend(origins)
+        reached = merged
+
+    if position < size:
+        (state, origins), = reached.items()
+        row = rows[state]
+        for char in text[position:]:
+            row = row[char]
+        reached = {row.node.id: origins}
+
+    mapping = [0] * len(rows)
+    for state, origins in reached.items():
+        for origin in origins:
+            mapping[origin] = state
+    return mapping
+
+
+def scan_chunk(cls, table, flags: int, path: str, start: int, end: int,
+               encoding: str) -> Chunk:
+    r"""
+    Worker side of :func:`scan_file`, scan the bytes ``[start, end)`` of
+    the file.
+
+    :returns: the ``(head_mapping, head, lines, tail_state, tail)``
+        tuple. ``head`` is the text up to the first ``\n`` and
+        ``head_mapping`` the state reached reading it from each state.
+        ``lines`` are the complete matching lines. ``tail`` is the text
+        after the last ``\n`` and ``tail_state`` the state reached
+        reading it from the initial state. When the chunk holds no
+        ``\n``, ``head`` is the whole chunk and ``tail_state`` is None.
+    """
+    automaton = cls.from_table(table, flags)
+    with open(path, "rb") as fd:
+        fd.seek(start)
+        text = fd.read(end - start).decode(encoding, "surrogateescape")
+    if "\r" in text:
+        # Universal newlines, as the text streams of open_text
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    rows = list(automaton._rows().values())
+    first = text.find("\n")
+    if first == -1:
+        return transfer(rows, automaton._fold(text)), text, [], None, ""
+
+    last = text.rfind("\n")
+    head = text[:first]
+    body = text[first + 1:last + 1]
+    tail = text[last + 1:]
+    lines = [body[start:end] for start, end in automaton.scan_lines(body)]
+    row = rows[0]
+    for char in automaton._fold(tail):
+        row = row[char]
+    return transfer(rows, automaton._fold(head)), head, lines, row.node.id, tail
+
+
+def _boundary(fd, offset: int) -> int:
+    """
+    Move the offset forward past UTF-8 continuation bytes and out of a
+    ``\r\n`` pair
+    """
+    fd.seek(offset)
+    for byte in fd.read(4):
+        if byte & 0xC0 != 0x80:
+            break
+        offset += 1
+    fd.seek(offset - 1)
+    if fd.read(2) == b"\r\n":
+        offset += 1
+    return offset
+
+
+def scan_file(automaton, path: str, workers: Optional[int]=None,
+              size: int=CHUNK_SIZE, encoding: Optional[str]=None,
+              executor=None) -> Iterator[str]:
+    """
+    Match every line of the file using a pool of worker processes, see
+    :meth:`DFA.scan_file <regexp.automatons.DFA.scan_file>`.
+
+    :param executor: a running ``ProcessPoolExecutor`` of ``workers``
+        processes to submit the chunks to instead of a pool of its own.
+    """
+    encoding = encoding or getpreferredencoding(False)
+    length = getsize(path)
+    with open(path, "rb") as fd:
+        offsets = sorted({0, length} | {
+            _boundary(fd, offset) for offset in range(size, length, size)})
+    spans = list(zip(offsets, offsets[1:]))
+    workers = min(workers or cpu_count() or 1, len(spans) or 1)
+
+    cls = automaton.__class__
+    table = automaton.to_table()
+    finals = [is_final for is_final, _ in table]
+
+    def submitted(pool) -> Iterator[Chunk]:
+        # Keep a bounded window of chunks in flight, in file order
+        pending = deque()
+        try:
+            for start, end in spans:
+                pending.append(pool.submit(
+                    scan_chunk, cls, table, automaton.flags, path, start, end, encoding))
+                if len(pending) > 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # The caller stopped reading the lines
+            for future in pending:
+                future.cancel()
+
+    def chunks() -> Iterator[Chunk]:
+        if executor is not None:
+            yield from submitted(executor)
+        elif workers == 1:
+            for start, end in spans:
+                yield scan_chunk(cls, table, automaton.flags, path, start, end, encoding)
+        else:
+            # Imported here, the process pool is costly to import
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                yield from submitted(pool)
+
+    state = 0
+    line = []
+    for head_mapping, head, lines, tail_state, tail in chunks():
+        state = head_mapping[state]
+        line.append(head)
+        if tail_state is None:
+            continue
+        if finals[state]:
+            yield "".join(line)
+        yield from lines
+        state = tail_state
+        line = [tail]
+
+    line = "".join(line)
+    if line and finals[state]:
+        yield line
@@ -1,4 +1,5 @@
 from itertools import tee, zip_longest
+from typing import Collection, List, Optional, Tuple
 from .char import SIGMA
 from .nodes import NDN
 
@@ -6,11 +7,17 @@ IGNORE_CASE = 0b1
 
 class ParsingError(Exception):
     def __init__(self, message, pattern, index):
+        self.message = message
+        self.pattern = pattern
+        self.index = index
         substr = pattern[max(index-3, 0):min(index+3, len(pattern))]
         super().__init__("{}. At index {}: {}".format(message, index, substr))
 
+    def __reduce__(self):
+        return self.__class__, (self.message, self.pattern, self.index)
 
-def parse(pattern: str, flags: int) -> NDN:
+
+def parse(pattern: str, flags: int, captures: Optional[Collection[int]]=None) -> NDN:
     r"""
     Parse a pattern, return the resulting starting :func:`Node
     <regexp.nodes.NDN>`
@@ -42,8 +49,31 @@ def parse(pattern: str, flags: int) -> NDN:
     Available flags are:
 
     * :func:`<regexp.pattern.IGNORE_CASE>`: Match lowercase letters and
-    uppercase letters indifferently.
+      uppercase letters indifferently. The characters of the pattern are
+      case folded, the automaton is expected to fold the characters it
+      reads using the same :data:`~regexp.casefold.CASEFOLD` table.
+
+    Groups are numbered from 1 in the order of their opening
+    parenthesis. The nth captured group is delimited by the tags
+    ``2n-2`` (entering the group) and ``2n-1`` (leaving the group) set
+    on the :func:`nodes <regexp.nodes.NDN>`. Only the groups listed in
+    ``captures`` are tagged, all of them when ``captures`` is None.
     """
+    if flags & IGNORE_CASE:
+        # Imported here, only needed to ignore case
+        from .casefold import CASEFOLD
+
+    ordinal = 0
+    captured = 0
+
+    def capture():
+        nonlocal ordinal, captured
+        ordinal += 1
+        if captures is not None and ordinal not in captures:
+            return None, None
+        captured += 1
+        return 2 * captured - 2, 2 * captured - 1
+
     def main():
         start = NDN()
         end = NDN(is_final=True)
@@ -58,15 +88,16 @@ def parse(pattern: str, flags: int) -> NDN:
         except StopIteration:
             pass
         else:
-            raise ParsingError("Unmatched parenthesis", len(pattern)-1, pattern)
+            raise ParsingError("Unmatched parenthesis", pattern, len(pattern)-1)
         return start
 
-    def groups(start, end, iteratee, start_index):
+    def groups(start, end, iteratee, start_index, tags=(None, None)):
+        open_tag, close_tag = tags
         skip = False
         escape = False
         kleene_start = NDN()
         start.add("", kleene_start)
-        last_node = kleene_start
+        last_node = branch(kleene_start, open_tag)
         last_nodes = []
 
         for delta_index, (char, next_char) in enumerate(iteratee):
@@ -92,21 +123,21 @@ def parse(pattern: str, flags: int) -> NDN:
 
             elif char == "(":
                 sub_end = NDN()
-                skip, start_index = groups(last_node, sub_end, iteratee, index + 1)
+                skip, start_index = groups(last_node, sub_end, iteratee, index + 1, capture())
                 last_node = sub_end
 
             elif char == ")":
+                last_nodes.append(close(last_node, close_tag))
                 if next_char == "*":
-                    kleene(start, kleene_start, last_node, *last_nodes).add("", end)
+                    kleene(start, kleene_start, *last_nodes).add("", end)
                     return True, index
-                else:
+                for last_node in last_nodes:
                     last_node.add("", end)
-                    return False, index
+                return False, index
 
             elif char == "|":
-                last_nodes.append(last_node)
-                last_node.add("", end)
-                last_node = kleene_start
+                last_nodes.append(close(last_node, close_tag))
+                last_node = branch(kleene_start, open_tag)
 
             elif char not in ("ε", "?"):
                 char_ = SIGMA if char in ("Σ", ".") else char
@@ -120,9 +151,27 @@ def parse(pattern: str, flags: int) -> NDN:
 
         if escape:
             raise ParsingError("Invalid escape sequence", pattern, index)
-        last_node.add("", end)
+        last_nodes.append(close(last_node, close_tag))
+        for last_node in last_nodes:
+            last_node.add("", end)
         return skip, index
 
+    def branch(kleene_start, open_tag):
+        # Each branch has its own entry, the branches are tried in
+        # order and the open tag is only set when the group is entered,
+        # never by the bypass of a kleene star
+        start = NDN(tag=open_tag)
+        kleene_start.add("", start)
+        return start
+
+    def close(last_node, close_tag):
+        # Likewise the close tag is set at the end of each branch
+        if close_tag is None:
+            return last_node
+        end = NDN(tag=close_tag)
+        last_node.add("", end)
+        return end
+
     def kleene(start, start_in, *ends_in):
         end = NDN()
         start.add("", start_in)
@@ -134,17 +183,45 @@ def parse(pattern: str, flags: int) -> NDN:
 
     def concat(start, char):
         new = NDN()
+        if flags & IGNORE_CASE and char is not SIGMA:
+            char = char.translate(CASEFOLD)
         start.add(char, new)
-        if flags & IGNORE_CASE:
-            if "a" <= char <= "z":
-                start.add(chr(ord(char) - 32), new)
-            elif "A" <= char <= "A":
-                start.add(chr(ord(char) + 32), new)
         return new
 
     return main()
 
 
+def literals(pattern: str) -> Optional[List[str]]:
+    r"""
+    Get the words of a pattern made of a pure literal alternation like
+    ``foo|bar|ba\*z`` or ``(foo|bar)``, None when the pattern uses any
+    other sequence.
+    """
+    if pattern.startswith("(") and pattern.endswith(")") and not pattern.endswith("\\)"):
+        pattern = pattern[1:-1]
+
+    words = []
+    word = []
+    escape_ = False
+    for char in pattern:
+        if escape_:
+            escape_ = False
+            word.append(char)
+        elif char == "\\":
+            escape_ = True
+        elif char == "|":
+            words.append("".join(word))
+            word = []
+        elif char in {"*", "(", ")", "Σ", ".", "ε", "?"}:
+            return None
+        else:
+            word.append(char)
+    if escape_:
+        return None
+    words.append("".join(word))
+    return words
+
+
 def escape(pattern: str) -> str:
     """Escape the given pattern to match pure text instead of regexp"""
     escaped = []
@@ -168,6 +245,15 @@ def expand(extended_pattern: str) -> str:
     * ``\d``, any digit, equivalent to ``[0-9]``
     * ``\w``, any letter, equivalent to ``[a-zA-Z0-9_]``
     """
+    return _expand(extended_pattern)[0]
+
+
+def _expand(extended_pattern: str) -> Tuple[str, List[int]]:
+    """
+    Expand the given extended pattern, also return the numbers of the
+    groups of the expanded pattern that come from the extended pattern
+    and not from an expansion.
+    """
 
     p1, p2 = tee(extended_pattern)
     p1, p3 = tee(extended_pattern)
@@ -181,6 +267,8 @@ def expand(extended_pattern: str) -> str:
     skip = 0
     expanding = False
     expansion = []
+    ordinal = 0
+    captures = []
     for idx, (char, next_char, next_next_char) in enumerate(iteratee):
         if skip:
             skip -= 1
@@ -197,29 +285,38 @@ def expand(extended_pattern: str) -> str:
                 expansion.extend(chars)
             elif char == "]":
                 expanding = False
+                ordinal += 1
                 expanded_pattern.extend("(%s)" % "|".join(expansion))
                 expansion = []
             else:
                 expansion.append(escape(char))
         elif escape_:
             escape_ = False
-            expanded_pattern.append(escape(char))
+            expanded_pattern.append(char)
         elif char == "\\":
-            expansion = _tokens.get(next_char)
-            if expansion:
+            token = _tokens.get(next_char)
+            if token:
                 skip = 1
-                expanded_pattern.extend(expansion)
+                ordinal += 1
+                expanded_pattern.extend(token)
             else:
                 escape_ = True
                 expanded_pattern.append(char)
         elif char == "[":
             expanding = True
         else:
+            if char == "(":
+                ordinal += 1
+                captures.append(ordinal)
             expanded_pattern.append(char)
 
-    return "".join(expanded_pattern)
+    return "".join(expanded_pattern), captures
 
+# Precomputed expansions of the \s, \d and \w extended sequences
 _tokens = {
     "s": "( |\n|\r|\t)",
-    "d": expand(r"[0-9]"),
-    "w": expand(r"[a-zA-Z0-9_]"),}
+    "d": "(0|1|2|3|4|5|6|7|8|9)",
+    "w": ("(a|b|c|d|e|f|g|h|i|j|k|l|m|n|o|p|q|r|s|t|u|v|w|x|y|z"
+          "|A|B|C|D|E|F|G|H|I|J|K|L|M|N|O|P|Q|R|S|T|U|V|W|X|Y|Z"
+          "|0|1|2|3|4|5|6|7|8|9|_)"),
+}
@@ -0,0 +1,109 @@
+"""
+Collections of patterns matched all at once and updated incrementally.
+"""
+
+
+from typing import Dict, FrozenSet, Iterator, Optional, Tuple
+
+from .automatons import FA
+from .casefold import CASEFOLD
+from .compile import compile
+from .nodes import Node
+from .pattern import IGNORE_CASE
+
+
+_MISSING = object()
+
+State = Tuple[Optional[Node], ...]
+
+
+class PatternSet:
+    """
+    A set of patterns matched in a single pass over the string.
+
+    Each pattern is compiled on its own by :func:`~regexp.compile`. The
+    product automaton of all the patterns, whose nodes are tuples of
+    nodes of the pattern automatons, is built lazily while matching and
+    its transitions are cached. Adding or removing a pattern only
+    compiles that pattern and drops the cached product.
+    """
+
+    def __init__(self, flags: int=0):
+        self.flags = flags
+        self._automatons: Dict[int, FA] = {}
+        self._next_id = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop the product automaton, it is rebuilt on the next match"""
+        self._ids = tuple(self._automatons)
+        self._initial = tuple(self._automatons[id_].initial_node for id_ in self._ids)
+        self._dead_nodes = tuple(self._automatons[id_]._dead_node for id_ in self._ids)
+        self._transitions: Dict[State, Dict[str, Optional[State]]] = {}
+        self._accepts: Dict[State, FrozenSet[int]] = {}
+
+    def add(self, pattern: str) -> int:
+        """Compile and add a pattern, return its identifier"""
+        automaton = compile(pattern, self.flags)
+        pattern_id = self._next_id
+        self._next_id += 1
+        self._automatons[pattern_id] = automaton
+        self._reset()
+        return pattern_id
+
+    def remove(self, pattern_id: int) -> None:
+        """Remove a pattern using the identifier returned by :meth:`add`"""
+        del self._automatons[pattern_id]
+        self._reset()
+
+    def __getitem__(self, pattern_id: int) -> FA:
+        return self._automatons[pattern_id]
+
+    def __contains__(self, pattern_id: int) -> bool:
+        return pattern_id in self._automatons
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._automatons)
+
+    def __len__(self) -> int:
+        return len(self._automatons)
+
+    def _step(self, state: State, char: str) -> Optional[State]:
+        """Compute the product transition, None once every pattern failed"""
+        target = []
+        for node, dead in zip(state, self._dead_nodes):
+            if node is not None:
+                node = node.read(char)
+                if node is dead:
+                    node = None
+            target.append(node)
+        if all(node is None for node in target):
+            return None
+        return tuple(target)
+
+    def _accepting(self, state: State) -> FrozenSet[int]:
+        accepts = self._accepts.get(state)
+        if accepts is None:
+            accepts = frozenset(
+                id_ for id_, node in zip(self._ids, state)
+                if node is not None and node.is_final)
+            self._accepts[state] = accepts
+        return accepts
+
+    def match(self, string: str) -> FrozenSet[int]:
+        """Get the identifiers of the patterns accepting the string"""
+        if self.flags & IGNORE_CASE:
+            string = string.translate(CASEFOLD)
+        state = self._initial
+        transitions = self._transitions
+        for char in string:
+            row = transitions.get(state)
+            if row is None:
+                row = transitions[state] = {}
+            target = row.get(char, _MISSING)
+            if target is _MISSING:
+                target = row[char] = self._step(state, char)
+            if target is None:
+                return frozenset()
+            state = target
+        return self._accepting(state)
@@ -0,0 +1,99 @@
+"""
+Opt-in instrumentation of the deterministic automatons.
+
+While an automaton is profiled (see
+:meth:`~regexp.automatons.DFA.start_profiling`), its ``match`` and
+``read_greedy`` methods are replaced on the instance by the instrumented
+versions below. The class methods are left untouched so an automaton
+that is not profiled runs exactly the same code as before.
+"""
+
+
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .char import SIGMA
+from .nodes import Node
+
+
+class Profile:
+    """Counters filled while matching with a profiled automaton"""
+
+    def __init__(self, size: int):
+        #: Number of calls to the profiled methods
+        self.calls = 0
+        #: Number of characters read
+        self.chars = 0
+        #: Number of characters read using the Σ transition
+        self.fallbacks = 0
+        #: Number of visits per node, indexed by node id
+        self.visits = [0] * size
+
+    def histogram(self) -> List[Tuple[int, int]]:
+        """Get the (node id, visits) pairs, most visited first"""
+        return sorted(((id_, visits) for id_, visits in enumerate(self.visits) if visits),
+                      key=lambda pair: (-pair[1], pair[0]))
+
+    def export(self) -> Dict[str, Any]:
+        """Export the counters as a JSON serializable dict"""
+        return {
+            "calls": self.calls,
+            "chars": self.chars,
+            "fallbacks": self.fallbacks,
+            "visits": dict(self.histogram()),
+        }
+
+    def __repr__(self):
+        return "<{} calls={} chars={} fallbacks={}>".format(
+            self.__class__.__name__, self.calls, self.chars, self.fallbacks)
+
+
+def walk(automaton, string: str) -> Iterator[Node]:
+    """Yield the nodes reached while reading the string, count them"""
+    profile = automaton.profile
+    visits = profile.visits
+    node = automaton.initial_node
+    visits[node.id] += 1
+    for letter in automaton._fold(string):
+        profile.chars += 1
+        transitions = node.transitions
+        target = transitions.get(letter)
+        if target is None:
+            target = transitions.get(SIGMA)
+            if target is not None:
+                profile.fallbacks += 1
+        node = target
+        if node is not None:
+            visits[node.id] += 1
+        yield node
+
+
+def match(automaton, string: str) -> bool:
+    """Instrumented :meth:`DFA.match <regexp.automatons.DFA.match>`"""
+    automaton.profile.calls += 1
+    node = automaton.initial_node
+    if node is automaton._accept_node:
+        automaton.profile.visits[node.id] += 1
+        return True
+    for node in walk(automaton, string):
+        if node is automaton._dead_node:
+            return False
+        if node is automaton._accept_node:
+            return True
+    return node.is_final
+
+
+def read_greedy(automaton, string: str) -> int:
+    """Instrumented :meth:`DFA.read_greedy <regexp.automatons.DFA.read_greedy>`"""
+    automaton.profile.calls += 1
+    if automaton.initial_node is automaton._accept_node:
+        automaton.profile.visits[automaton.initial_node.id] += 1
+        return len(string)
+    last_final_node = 0
+    for length, node in enumerate(walk(automaton, string), 1):
+        if node is automaton._dead_node:
+            break
+        if node is automaton._accept_node:
+            return len(string)
+        if node.is_final:
+            last_final_node = length
+    return last_final_node
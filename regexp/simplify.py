@@ -0,0 +1,246 @@
+"""
+Simplification passes run on a non deterministic automaton before its
+:func:`determinization <regexp.automatons.DFA.from_ndfa>`.
+
+Each pass takes the starting node of a graph of :func:`Non
+Deterministic Nodes <regexp.nodes.NDN>` and returns the starting node
+of a graph accepting the same strings. The passes work on a copy of the
+automaton, the capture tags are not preserved.
+"""
+
+
+from collections import defaultdict, deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .nodes import NDN
+
+
+Pass = Callable[[NDN], NDN]
+
+#: ``(pass name, nodes, transitions)`` after each pass
+Stats = List[Tuple[str, int, int]]
+
+
+def reachable(initial_node: NDN) -> List[NDN]:
+    """Gather the nodes reachable from the initial node"""
+    nodes = [initial_node]
+    seen = {initial_node}
+    for node in nodes:
+        for target in node.targets():
+            if target not in seen:
+                seen.add(target)
+                nodes.append(target)
+    return nodes
+
+
+def copy(initial_node: NDN) -> NDN:
+    """Copy the graph, without the tags"""
+    nodes = reachable(initial_node)
+    copies = {node: NDN(node.is_final) for node in nodes}
+    for node in nodes:
+        for target in node.epsilons:
+            copies[node].add("", copies[target])
+        for char, targets in node.transitions.items():
+            for target in targets:
+                copies[node].add(char, copies[target])
+    return copies[initial_node]
+
+
+def remove_epsilons(initial_node: NDN) -> NDN:
+    """
+    Replace the void transitions: a node gets the character transitions
+    of every node of its ε-closure and is final when one of them is.
+    The nodes only reachable by void transitions are dropped, the new
+    graph is built from the nodes it keeps only.
+    """
+    news = {initial_node: NDN()}
+    stack = [initial_node]
+    while stack:
+        node = stack.pop()
+        new = news[node]
+        closure = [node]
+        seen = {node}
+        for member in closure:
+            new.is_final = new.is_final or member.is_final
+            for target in member.epsilons:
+                if target not in seen:
+                    seen.add(target)
+                    closure.append(target)
+        for member in closure:
+            for char, targets in member.transitions.items():
+                new_targets = new.transitions.setdefault(char, {})
+                for target in targets:
+                    target_new = news.get(target)
+                    if target_new is None:
+                        target_new = news[target] = NDN()
+                        stack.append(target)
+                    new_targets[target_new] = None
+    return news[initial_node]
+
+
+def prune_dead(initial_node: NDN) -> NDN:
+    """Drop the transitions to the nodes that cannot reach a final node"""
+    nodes = reachable(initial_node)
+    sources = defaultdict(set)
+    for node in nodes:
+        for target in node.targets():
+            sources[target].add(node)
+
+    alive = {node for node in nodes if node.is_final}
+    stack = list(alive)
+    while stack:
+        for source in sources[stack.pop()]:
+            if source not in alive:
+                alive.add(source)
+                stack.append(source)
+
+    dead_sources = {source for node in nodes if node not in alive for source in sources[node]}
+    for node in dead_sources:
+        node.epsilons = {target: None for target in node.epsilons if target in alive}
+        for char, targets in list(node.transitions.items()):
+            targets = {target: None for target in targets if target in alive}
+            if targets:
+                node.transitions[char] = targets
+            else:
+                del node.transitions[char]
+    return initial_node
+
+
+def _in_degrees(initial_node: NDN, nodes: Sequence[NDN]) -> Dict[NDN, int]:
+    """Count the transitions entering each node, the entry point counts"""
+    degrees = defaultdict(int)
+    degrees[initial_node] += 1
+    for node in nodes:
+        for target in node.targets():
+            degrees[target] += 1
+    return degrees
+
+
+def factor_prefixes(initial_node: NDN) -> NDN:
+    """
+    Merge the targets of a same character transition that are only
+    entered by that transition, i.e. ``abc|abd`` becomes ``ab(c|d)``.
+    Run after :func:`remove_epsilons`.
+
+    The in-degrees are counted once and kept up to date while merging,
+    a node is visited again only when it gained transitions.
+    """
+    nodes = reachable(initial_node)
+    degrees = _in_degrees(initial_node, nodes)
+    merged = set()
+    queue = deque(nodes)
+    queued = set(nodes)
+    while queue:
+        node = queue.popleft()
+        queued.discard(node)
+        if node in merged:
+            continue
+        for char, targets in node.transitions.items():
+            alone = [target for target in targets if degrees[target] == 1]
+            if len(alone) < 2:
+                continue
+            head = alone[0]
+            for other in alone[1:]:
+                head.is_final = head.is_final or other.is_final
+                for other_char, other_targets in other.transitions.items():
+                    head_targets = head.transitions.setdefault(other_char, {})
+                    for target in other_targets:
+                        if target in head_targets:
+                            # Both transitions are now the same one
+                            degrees[target] -= 1
+                        else:
+                            head_targets[target] = None
+                merged.add(other)
+            node.transitions[char] = {
+                target: None for target in targets if target not in merged}
+            if head not in queued:
+                queue.append(head)
+                queued.add(head)
+    return initial_node
+
+
+def merge_equivalent(initial_node: NDN) -> NDN:
+    """
+    Merge the nodes with the same finality and the same transitions,
+    they accept the same strings. Run after :func:`remove_epsilons`.
+
+    A merge changes the transitions of the sources of the merged node,
+    only those sources are compared again, so common suffixes collapse
+    from their end.
+    """
+    nodes = reachable(initial_node)
+    sources = defaultdict(set)
+    for node in nodes:
+        for target in node.targets():
+            sources[target].add(node)
+    replace = {}
+
+    def find(node):
+        while node in replace:
+            node = replace[node]
+        return node
+
+    def signature(node):
+        return node.is_final, frozenset(
+            (char, frozenset(find(target) for target in targets))
+            for char, targets in node.transitions.items())
+
+    representatives = {}
+    signatures = {}
+    queue = deque(nodes)
+    queued = set(nodes)
+    while queue:
+        node = queue.popleft()
+        queued.discard(node)
+        signatures[node] = signature(node)
+        representative = representatives.setdefault(signatures[node], node)
+        if representative is node:
+            continue
+        replace[node] = representative
+        for source in sources.pop(node, ()):
+            sources[representative].add(source)
+            if source in replace or source in queued:
+                continue
+            # Its signature is outdated, drop it until it is computed again
+            if representatives.get(signatures.get(source)) is source:
+                del representatives[signatures[source]]
+            queue.append(source)
+            queued.add(source)
+
+    for node in nodes:
+        if node not in replace:
+            for char, targets in node.transitions.items():
+                node.transitions[char] = dict.fromkeys(find(target) for target in targets)
+    return find(initial_node)
+
+
+#: Default pipeline of :func:`simplify`
+PASSES: Sequence[Pass] = (remove_epsilons, prune_dead, factor_prefixes, merge_equivalent)
+
+
+def count(initial_node: NDN) -> Tuple[int, int]:
+    """Count the nodes and the transitions of the graph"""
+    nodes = reachable(initial_node)
+    return len(nodes), sum(1 for node in nodes for _ in node.targets())
+
+
+def simplify(initial_node: NDN, passes: Sequence[Pass]=PASSES,
+             stats: Optional[Stats]=None) -> NDN:
+    """
+    Run the passes on a copy of the graph, :func:`remove_epsilons`
+    builds a new graph so the graph is only copied when the passes do
+    not start with it.
+
+    :param stats: a list extended with the size of the graph before and
+        after each pass, the graph is only counted when it is given.
+    :returns: the simplified starting node.
+    """
+    if stats is not None:
+        stats.append(("input", *count(initial_node)))
+    if not passes or passes[0] is not remove_epsilons:
+        initial_node = copy(initial_node)
+    for pass_ in passes:
+        initial_node = pass_(initial_node)
+        if stats is not None:
+            stats.append((pass_.__name__, *count(initial_node)))
+    return initial_node
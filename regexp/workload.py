@@ -0,0 +1,190 @@
+"""
+Generation of the strings accepted or rejected by an automaton, to feed
+benchmarks and load tests.
+"""
+
+
+import random as _random
+from itertools import chain
+from typing import Iterator, List, Optional, Sequence
+
+from .automatons import FA
+from .char import SIGMA
+from .pattern import IGNORE_CASE
+
+#: Candidates to stand for the characters read by a Σ transition
+_PLACEHOLDERS = "xyzqjkwvXYZ0123456789_"
+
+
+class Workload:
+    """
+    Count, sample and enumerate the strings accepted by an automaton by
+    dynamic programming over its deterministic version.
+
+    The strings are made of the characters of the alphabet. By default
+    the alphabet is made of the characters of the transitions of the
+    automaton, plus a character that none of its transitions read
+    explicitly, standing for Σ, when the automaton has Σ transitions.
+    When the automaton ignores case, the alphabet is case folded and the
+    strings are made of folded characters.
+
+    :param random: a :class:`random.Random` instance, default to the
+        functions of the :mod:`random` module.
+    """
+
+    def __init__(self, automaton: FA, alphabet: Optional[Sequence[str]]=None,
+                 random: Optional[_random.Random]=None):
+        self.automaton = automaton
+        self.random = random or _random
+        self.flags = automaton.flags
+        # Number the states apart, the nodes may belong to the automaton
+        initial_node = automaton._deterministic_node()
+        nodes = [initial_node]
+        ids = {initial_node: 0}
+        for node in nodes:
+            for target in node.targets():
+                if target not in ids:
+                    ids[target] = len(nodes)
+                    nodes.append(target)
+
+        if alphabet is None:
+            chars = {char for node in nodes for char in node.transitions}
+            alphabet = sorted(char for char in chars if char is not SIGMA)
+            if SIGMA in chars:
+                alphabet.append(self._placeholder(chars))
+        self.alphabet = sorted(set(self._fold("".join(alphabet))))
+
+        #: Target state of each state and alphabet character, None when
+        #: the string cannot be accepted anymore
+        self._targets: List[List[Optional[int]]] = []
+        for node in nodes:
+            row = []
+            for char in self.alphabet:
+                target = node.read(char)
+                row.append(None if target is None else ids[target])
+            self._targets.append(row)
+        self._finals = [node.is_final for node in nodes]
+        #: _counts[n][state], number of accepted strings of length n
+        #: read from the state
+        self._counts = [[int(is_final) for is_final in self._finals]]
+
+    def _fold(self, string: str) -> str:
+        if self.flags & IGNORE_CASE:
+            from .casefold import CASEFOLD
+            return string.translate(CASEFOLD)
+        return string
+
+    def _placeholder(self, chars) -> str:
+        """A character read by none of the chars, even once folded"""
+        start = max((ord(char) for char in chars if char is not SIGMA), default=0) + 1
+        candidates = chain(_PLACEHOLDERS, map(chr, range(start, 0x110000)))
+        return next(char for char in candidates
+                    if char not in chars and self._fold(char) == char)
+
+    def _count(self, length: int) -> List[int]:
+        counts = self._counts
+        while len(counts) <= length:
+            previous = counts[-1]
+            counts.append([
+                sum(previous[target] for target in row if target is not None)
+                for row in self._targets])
+        return counts[length]
+
+    def count(self, length: int) -> int:
+        """Count the accepted strings of the given length"""
+        return self._count(length)[0]
+
+    def accepts(self, string: str) -> bool:
+        """Accept or reject a string made of characters of the alphabet"""
+        state = 0
+        for char in self._fold(string):
+            state = self._targets[state][self.alphabet.index(char)]
+            if state is None:
+                return False
+        return self._finals[state]
+
+    def sample(self, length: int) -> str:
+        """
+        Draw an accepted string of the given length, all the accepted
+        strings have the same probability.
+
+        :raises ValueError: when no string of that length is accepted.
+        """
+        if not self.count(length):
+            raise ValueError("No accepted string of length {}".format(length))
+        chars = []
+        state = 0
+        for remaining in range(length - 1, -1, -1):
+            counts = self._counts[remaining]
+            pick = self.random.randrange(self._counts[remaining + 1][state])
+            for char, target in zip(self.alphabet, self._targets[state]):
+                if target is None:
+                    continue
+                if pick < counts[target]:
+                    chars.append(char)
+                    state = target
+                    break
+                pick -= counts[target]
+        return "".join(chars)
+
+    def shortlex(self, max_length: Optional[int]=None) -> Iterator[str]:
+        """
+        Enumerate the accepted strings, shortest first and in
+        alphabetical order among strings of the same length. Stop after
+        ``max_length`` or once no longer string can be accepted.
+        """
+        # States that can still reach a final state
+        alive = {state for state, is_final in enumerate(self._finals) if is_final}
+        grown = True
+        while grown:
+            grown = False
+            for state, row in enumerate(self._targets):
+                if state not in alive and any(target in alive for target in row):
+                    alive.add(state)
+                    grown = True
+
+        reached = {0} & alive
+        length = 0
+        while reached and (max_length is None or length <= max_length):
+            if self.count(length):
+                yield from self._enumerate(0, length, "")
+            reached = {target for state in reached for target in self._targets[state]
+                       if target in alive}
+            length += 1
+
+    def _enumerate(self, state: int, length: int, prefix: str) -> Iterator[str]:
+        if not length:
+            yield prefix
+            return
+        counts = self._count(length - 1)
+        for char, target in zip(self.alphabet, self._targets[state]):
+            if target is not None and counts[target]:
+                yield from self._enumerate(target, length - 1, prefix + char)
+
+    def near_misses(self, length: int, count: int, attempts: int=100) -> List[str]:
+        """
+        Produce rejected strings close to accepted ones: an accepted
+        string of the given length is drawn and one character is
+        replaced, inserted or deleted until the result is rejected.
+
+        :param attempts: number of mutations tried per string, less than
+            ``count`` strings are returned when the automaton rejects too
+            few strings.
+        """
+        misses = []
+        for _ in range(count):
+            for _ in range(attempts):
+                string = self.sample(length)
+                index = self.random.randrange(length + 1)
+                char = self.random.choice(self.alphabet)
+                mutation = self.random.randrange(3)
+                if mutation == 0 and index < length:
+                    string = string[:index] + char + string[index + 1:]
+                elif mutation == 1:
+                    string = string[:index] + char + string[index:]
+                elif index < length:
+                    string = string[:index] + string[index + 1:]
+                if not self.accepts(string):
+                    misses.append(string)
+                    break
+        return misses
@@ -16,6 +16,9 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/Julien00859/regexp",
     packages=setuptools.find_packages(),
+    python_requires=">=3.7",
+    # vermin checks the minimum Python version: vermin -t=3.7- regexp
+    extras_require={"dev": ["vermin"]},
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Environment :: Console",
@@ -1,8 +1,23 @@
 """Test automaton methods"""
 
 
+import pickle
+import re
 import unittest
-from regexp import compile
+from contextlib import redirect_stdout
+from copy import copy
+from importlib import import_module
+from io import StringIO
+from itertools import chain, islice, product
+from random import Random
+from tempfile import NamedTemporaryFile
+from unittest.mock import patch
+from regexp import compile, compile_many, compile_fuzzy, prune, IGNORE_CASE, Lexer, PatternSet, Workload
+from regexp.automatons import ACA, DCFA, DCIFA, DCMFA, DFA, NFA, TDFA
+from regexp.compile import PROMOTE_AFTER
+from regexp.files import open_text
+from regexp.lexer import LexingError
+from regexp.pattern import ParsingError
 
 class TestReadLazy(unittest.TestCase):
     def test_single_match(self):
@@ -38,3 +53,561 @@ class TestReadGreedy(unittest.TestCase):
     def test_kleene(self):
         auto = compile("ab*")
         self.assertEqual(auto.read_greedy("abbbbbb"), 7)
+
+
+class TestCompileMany(unittest.TestCase):
+    def test_compile_many(self):
+        patterns = ["ab*c", "(a|b)*", "ab*c", "a)b", "abc"]
+        autos = compile_many(patterns, workers=2)
+        self.assertEqual(len(autos), len(patterns))
+        self.assertIs(autos[0], autos[2])
+        self.assertIsInstance(autos[3], ParsingError)
+        self.assertTrue(autos[0].match("abbc"))
+        self.assertFalse(autos[0].match("abbd"))
+        self.assertTrue(autos[1].match("abba"))
+        self.assertTrue(autos[4].match("abc"))
+        self.assertFalse(autos[4].match("abcd"))
+
+    def test_intern(self):
+        auto = compile("(a|b)*")
+        self.assertIs(compile("(b|a)*"), auto)
+        self.assertIs(compile("(a*b*)*"), auto)
+        self.assertIsNot(compile("(a|b)*", IGNORE_CASE), auto)
+        self.assertIsNot(compile("(a|b|c)*"), auto)
+        self.assertIs(compile("foo|bar"), compile("bar|foo"))
+        self.assertIs(compile_many(["(b|a)*", "a"], workers=1)[0], auto)
+
+    def test_canonical_table(self):
+        table = compile("Σ*abΣ*").to_canonical_table()
+        self.assertEqual(DCMFA.from_pattern("Σ*a(b)Σ*", 0).to_canonical_table(), table)
+        self.assertEqual(DCMFA.from_table(table).to_canonical_table(), table)
+
+    def test_table_roundtrip(self):
+        auto = compile("(a|b)*c")
+        rebuilt = DCMFA.from_table(auto.to_table())
+        self.assertEqual(rebuilt.to_table(), auto.to_table())
+
+
+class TestPlanner(unittest.TestCase):
+    def test_engines(self):
+        self.assertEqual(compile("ab*c").engine, "dfa")
+        self.assertEqual(compile("ab*c", hint="hot").engine, "dfa")
+        self.assertEqual(compile("foo|bar").engine, "literal")
+        self.assertEqual(compile("foo|bar", hint="once").engine, "literal")
+        self.assertEqual(compile("foo").engine, "literal")
+        self.assertEqual(compile("foo", hint="hot").engine, "literal")
+        with self.assertRaises(ValueError):
+            compile("ab", hint="warm")
+
+    def test_large_pattern(self):
+        pattern = "|".join("w{}x*y".format(i) for i in range(400))
+        self.assertEqual(compile(pattern).engine, "nfa")
+
+    def test_promote(self):
+        auto = compile("ab*c", hint="once")
+        self.assertEqual(auto.engine, "nfa")
+        for _ in range(PROMOTE_AFTER):
+            self.assertTrue(auto.match("abbc"))
+        self.assertEqual(auto.engine, "nfa")
+        self.assertFalse(auto.match("abb"))
+        self.assertEqual(auto.engine, "dfa")
+        self.assertIs(auto.dfa, compile("ab*c"))
+
+    def test_promote_on_other_methods(self):
+        auto = compile("ab*c", hint="once")
+        self.assertEqual(auto.read_greedy("abcx"), 3)
+        self.assertEqual(auto.engine, "dfa")
+
+    def test_copy_and_pickle(self):
+        auto = compile("ab*c", hint="once")
+        for clone in (copy(auto), pickle.loads(pickle.dumps(auto))):
+            self.assertEqual(clone.engine, "nfa")
+            self.assertTrue(clone.match("abbc"))
+        self.assertEqual(auto.engine, "nfa")
+
+
+class TestEarlyExit(unittest.TestCase):
+    @staticmethod
+    def explode():
+        raise AssertionError("should have stopped reading")
+        yield
+
+    def test_accept_forever(self):
+        auto = compile("Σ*aΣ*")
+        self.assertTrue(auto.match(chain("xxa", self.explode())))
+        self.assertEqual(auto.read_greedy("xxayy"), 5)
+
+    def test_reject_forever(self):
+        auto = compile("ab*")
+        self.assertFalse(auto.match(chain("ac", self.explode())))
+        self.assertEqual(auto.read_lazy(chain("c", self.explode())), 0)
+
+    def test_read_lazy_no_final(self):
+        self.assertEqual(compile("abc").read_lazy("ab"), 0)
+
+
+class TestScanLines(unittest.TestCase):
+    buffer = "xxab\nfoo\nab\n\nzzzab"
+
+    def lines(self, pattern):
+        auto = compile(pattern)
+        return [self.buffer[start:end] for start, end in auto.scan_lines(self.buffer)]
+
+    def test_substring(self):
+        self.assertEqual(self.lines("Σ*abΣ*"), ["xxab", "ab", "zzzab"])
+
+    def test_fullmatch(self):
+        self.assertEqual(self.lines("ab"), ["ab"])
+
+    def test_empty_line(self):
+        self.assertEqual(self.lines("ab|ε"), ["ab", ""])
+
+    def test_literal(self):
+        self.assertEqual(compile("foo|ab").engine, "literal")
+        self.assertEqual(self.lines("foo|ab"), ["foo", "ab"])
+        self.assertEqual(self.lines("ab|"), ["ab", ""])
+
+    def test_completed_copy(self):
+        auto = DFA.from_pattern("ab*c", 0)
+        DCFA.from_dfa(auto)
+        self.assertEqual([node.id for node in auto.nodes], [0, 1, 2])
+        self.assertEqual(list(auto.scan_lines("abc\nac")), [(0, 3), (4, 6)])
+
+    def test_accept_all(self):
+        self.assertEqual(self.lines("Σ*"), ["xxab", "foo", "ab", "", "zzzab"])
+
+    def test_sigma_after_prefix(self):
+        auto = compile("Σ*fooΣ*")
+        self.assertTrue(auto.match("ffoo"))
+        self.assertTrue(auto.match("abc foo"))
+
+    def test_skip(self):
+        lines = ["xxxxabxx", "xaxbxa", "aab", "bbba", "ab", "", "cab", "abab"]
+        buffer = "\n".join(lines)
+        for pattern in ("Σ*abΣ*", "Σ*(ab|ca)Σ*", "Σ*ab", "Σ*a(b|c)b*", "aΣ*"):
+            auto = compile(pattern)
+            expected = [line for line in lines if auto.match(line)]
+            found = [buffer[start:end] for start, end in auto.scan_lines(buffer)]
+            self.assertEqual(found, expected, pattern)
+
+    def test_stream(self):
+        auto = compile("Σ*abΣ*")
+        lines = auto.scan_stream(StringIO(self.buffer), size=3)
+        self.assertEqual(list(lines), ["xxab", "ab", "zzzab"])
+
+    def test_stream_long_line(self):
+        auto = compile("Σ*abΣ*")
+        line = "x" * 1000 + "ab" + "y" * 1000
+        lines = auto.scan_stream(StringIO("foo\n" + line + "\n" + line), size=7)
+        self.assertEqual(list(lines), [line, line])
+
+    def test_file(self):
+        with NamedTemporaryFile("w", encoding="utf-8", suffix=".txt") as fd:
+            fd.write(self.buffer.replace("foo", "fé€o"))
+            fd.flush()
+            for pattern, workers, size in product(("Σ*abΣ*", "f.*o|Σ*zab"), (1, 2), (1, 3, 64)):
+                auto = DCMFA.from_pattern(pattern, 0)
+                expected = list(auto.scan_stream(StringIO(self.buffer.replace("foo", "fé€o"))))
+                lines = auto.scan_file(fd.name, workers, size, "utf-8")
+                self.assertEqual(list(lines), expected)
+
+    def test_file_crlf(self):
+        text = "ab\r\nxab\r\rab\r\n\r\nabab\r\nab"
+        with NamedTemporaryFile("wb", suffix=".txt") as fd:
+            fd.write(text.encode())
+            fd.flush()
+            for pattern, size in product(("ab", "Σ*ab", "a.*"), (1, 2, 3, 64)):
+                auto = DCMFA.from_pattern(pattern, 0)
+                with open_text(fd.name, "utf-8") as stream:
+                    expected = list(auto.scan_stream(stream))
+                lines = auto.scan_file(fd.name, 1, size, "utf-8")
+                self.assertEqual(list(lines), expected, (pattern, size))
+
+
+class TestGroups(unittest.TestCase):
+    def assertGroups(self, pattern, string, groups):
+        match = TDFA.from_extended_pattern(pattern, 0).match(string)
+        self.assertIsNotNone(match)
+        self.assertEqual(match.groups(), groups)
+
+    def test_concat(self):
+        self.assertGroups("(a*)(b*)", "aabbb", ("aa", "bbb"))
+
+    def test_last_iteration(self):
+        self.assertGroups("(a)*", "aaa", ("a",))
+        self.assertGroups("((a)|b)*", "ab", ("b", "a"))
+
+    def test_unset(self):
+        self.assertGroups("(a)*b", "b", (None,))
+
+    def test_greedy(self):
+        self.assertGroups("(a|b)*(b)", "aab", ("a", "b"))
+        self.assertGroups("Σ*(foo)Σ*", "foo foo", ("foo",))
+
+    def test_expansion_not_captured(self):
+        self.assertGroups(r"(\d\d*)-[ab](\w\w*)", "12-ax_", ("12", "x_"))
+
+    def test_span(self):
+        match = TDFA.from_pattern("ab(c*)d", 0).match("abccd")
+        self.assertEqual(match.span(1), (2, 4))
+        self.assertEqual(match.group(), "abccd")
+
+    def test_like_re(self):
+        patterns = ["((ab)*c)*", "((ab)*a)*", "((a)|a)", "(a|(a))", "((a)|(b))*",
+                    "((b)(a)*)*", "(a(b)|ab)*", "((a)*b|a(b))*"]
+        for pattern in patterns:
+            automaton = TDFA.from_pattern(pattern, 0)
+            for size in range(6):
+                for string in map("".join, product("abc", repeat=size)):
+                    expected = re.fullmatch(pattern, string)
+                    match = automaton.match(string)
+                    with self.subTest(pattern=pattern, string=string):
+                        self.assertEqual(match and match.groups(), expected and expected.groups())
+
+    def test_no_match(self):
+        self.assertIsNone(TDFA.from_pattern("a(b)", 0).match("ac"))
+        self.assertIsNone(TDFA.from_pattern("a(b)", 0).match("a"))
+
+
+class TestFuzzy(unittest.TestCase):
+    @staticmethod
+    def distance(a, b):
+        row = list(range(len(b) + 1))
+        for i, char_a in enumerate(a, 1):
+            prev, row[0] = row[0], i
+            for j, char_b in enumerate(b, 1):
+                prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (char_a != char_b))
+        return row[-1]
+
+    def test_against_distance(self):
+        word = "abca"
+        auto = compile_fuzzy(word, 2)
+        for length in range(7):
+            for string in map("".join, product("abc", repeat=length)):
+                self.assertEqual(auto.match(string), self.distance(word, string) <= 2, string)
+
+    def test_zero_edits(self):
+        auto = compile_fuzzy("kitten", 0)
+        self.assertTrue(auto.match("kitten"))
+        self.assertFalse(auto.match("sitten"))
+
+    def test_substring(self):
+        auto = compile_fuzzy("kitten", 1, substring=True)
+        self.assertTrue(auto.match("the kiten sat"))
+        self.assertFalse(auto.match("the kien sat"))
+
+    def test_ignore_case(self):
+        auto = compile_fuzzy("Kitten", 1, IGNORE_CASE)
+        self.assertTrue(auto.match("kITTN"))
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_routing(self):
+        self.assertIsInstance(compile("he|she|his|hers"), ACA)
+        self.assertIsInstance(compile("(he|she)"), ACA)
+        self.assertNotIsInstance(compile("he|she*"), ACA)
+
+    def test_match(self):
+        auto = compile("he|she|his|hers")
+        self.assertTrue(auto.match("she"))
+        self.assertTrue(auto.match("hers"))
+        self.assertFalse(auto.match("her"))
+        self.assertFalse(auto.match("shers"))
+
+    def test_read(self):
+        auto = compile("a|ab|abc")
+        self.assertEqual(auto.read_greedy("abcd"), 3)
+        self.assertEqual(auto.read_lazy("abcd"), 1)
+        self.assertEqual(auto.read_lazy("bcd"), 0)
+
+    def test_finditer(self):
+        auto = compile("he|she|his|hers")
+        self.assertEqual(list(auto.finditer("ushers ahishe")), [(1, 4), (8, 11), (11, 13)])
+        auto = compile("bcd|abcde|cd")
+        self.assertEqual(list(auto.finditer("abcdx abcde")), [(1, 4), (6, 11)])
+
+    def test_search(self):
+        auto = compile("foo|bar")
+        self.assertEqual(auto.search("a bar foo"), (2, 5))
+        self.assertIsNone(auto.search("baz"))
+
+    def test_ignore_case(self):
+        auto = compile("Foo|bar", IGNORE_CASE)
+        self.assertTrue(auto.match("BAR"))
+        self.assertEqual(auto.search("xFOO"), (1, 4))
+
+    def test_compile_many(self):
+        auto, = compile_many(["foo|bar"], workers=1)
+        self.assertIsInstance(auto, ACA)
+        self.assertTrue(auto.match("bar"))
+
+
+class TestPatternSet(unittest.TestCase):
+    def test_match(self):
+        patterns = PatternSet()
+        ab = patterns.add("ab*")
+        ac = patterns.add("a(b|c)")
+        words = patterns.add("foo|bar")
+        self.assertEqual(patterns.match("ab"), {ab, ac})
+        self.assertEqual(patterns.match("abbb"), {ab})
+        self.assertEqual(patterns.match("bar"), {words})
+        self.assertEqual(patterns.match("zzz"), set())
+
+    def test_add_remove(self):
+        patterns = PatternSet()
+        ab = patterns.add("ab*")
+        self.assertEqual(patterns.match("ab"), {ab})
+        ac = patterns.add("a(b|c)")
+        self.assertEqual(patterns.match("ab"), {ab, ac})
+        patterns.remove(ab)
+        self.assertEqual(patterns.match("ab"), {ac})
+        self.assertNotIn(ab, patterns)
+        self.assertEqual(len(patterns), 1)
+
+    def test_empty(self):
+        self.assertEqual(PatternSet().match("a"), set())
+        self.assertEqual(PatternSet().match(""), set())
+
+    def test_ignore_case(self):
+        patterns = PatternSet(IGNORE_CASE)
+        foo = patterns.add("fo*")
+        self.assertEqual(patterns.match("FOO"), {foo})
+
+
+class TestSub(unittest.TestCase):
+    def test_finditer(self):
+        auto = compile("ab*c")
+        self.assertEqual(list(auto.finditer("xabbcacabc")), [(1, 5), (5, 7), (7, 10)])
+        self.assertEqual(list(compile("a|a*b").finditer("aaab")), [(0, 4)])
+        self.assertEqual(list(compile("a*b").finditer("a" * 100)), [])
+
+    def test_finditer_leftmost_longest(self):
+        random = Random(0)
+        for pattern in ("a|a(a|b)*c", "(ab|b)*c?", "a.b", "(a|b)*b(a|b)"):
+            auto = compile(pattern)
+            for _ in range(50):
+                text = "".join(random.choice("abc") for _ in range(random.randrange(12)))
+                expected = []
+                position = 0
+                while position < len(text):
+                    end = max((end for end in range(position + 1, len(text) + 1)
+                               if auto.match(text[position:end])), default=None)
+                    if end is None:
+                        position += 1
+                    else:
+                        expected.append((position, end))
+                        position = end
+                self.assertEqual(list(auto.finditer(text)), expected, (pattern, text))
+
+    def test_finditer_linear(self):
+        # Every forward read from a start used to run to the end of the
+        # string, each a can still begin a longer match
+        size = 50000
+        self.assertEqual(list(compile("a|a(a|b)*c").finditer("a" * size)),
+                         [(index, index + 1) for index in range(size)])
+
+    def test_sub(self):
+        auto = compile("ab*c")
+        self.assertEqual(auto.sub("#", "xabbcyac"), "x#y#")
+        self.assertEqual(auto.sub(str.upper, "xabbcyac"), "xABBCyAC")
+        self.assertEqual(auto.subn("#", "abc abc abc", count=2), ("# # abc", 2))
+        self.assertEqual(compile("foo|bar").sub("***", "foobarbaz"), "******baz")
+
+    def test_split(self):
+        auto = compile("  *")
+        self.assertEqual(auto.split("a b  c"), ["a", "b", "c"])
+        self.assertEqual(auto.split("a b  c", maxsplit=1), ["a", "b  c"])
+        self.assertEqual(auto.split(""), [""])
+
+    def test_sub_stream(self):
+        auto = compile("ab*c")
+        output = StringIO()
+        count = auto.sub_stream("#", StringIO("abc\nxabbbc\nac ac"), output, size=3)
+        self.assertEqual(output.getvalue(), "#\nx#\n# #")
+        self.assertEqual(count, 4)
+
+        output = StringIO()
+        auto.sub_stream("#", StringIO("abc\nabc\nabc\n"), output, count=2)
+        self.assertEqual(output.getvalue(), "#\n#\nabc\n")
+
+    def test_split_stream(self):
+        pieces = compile("b").split_stream(StringIO("abc\nbb\nx"), size=2)
+        self.assertEqual(list(pieces), ["a", "c\n", "", "\nx"])
+
+
+class TestLanguage(unittest.TestCase):
+    def test_equivalent(self):
+        self.assertTrue(compile("ab*").equivalent(compile("abb*|a")))
+        self.assertTrue(compile("Σ*").equivalent(compile("(a|Σ)*")))
+        self.assertTrue(compile("foo|bar").equivalent(compile("bar|foo")))
+        self.assertTrue(NFA.from_pattern("(a|b)*", 0).equivalent(compile("(a*b*)*")))
+        self.assertFalse(compile("ab*").equivalent(compile("a(b|c)*")))
+
+    def test_is_subset_of(self):
+        self.assertTrue(compile("ab*").is_subset_of(compile("a(b|c)*")))
+        self.assertFalse(compile("a(b|c)*").is_subset_of(compile("ab*")))
+        self.assertTrue(compile("foo|bar").is_subset_of(compile("(f|b)Σ*")))
+        self.assertFalse(compile("Σ").is_subset_of(compile("a")))
+
+    def test_inverted(self):
+        inverted = DCIFA.from_pattern("a", 0)
+        self.assertTrue(compile("b|ε|aa").is_subset_of(inverted))
+        self.assertFalse(compile("a").is_subset_of(inverted))
+
+    def test_flags(self):
+        with self.assertRaises(ValueError):
+            compile("a").equivalent(compile("a", IGNORE_CASE))
+
+    def test_prune(self):
+        self.assertEqual(prune(["ab*", "a", "a(b|c)*", "ba", "ba", "(b|c)a"]),
+                         ["a(b|c)*", "(b|c)a"])
+        self.assertEqual(prune(["a(b|c)", "ab", "ac"]), ["a(b|c)"])
+        self.assertEqual(prune(["ab", "ac", "a(b|c)"]), ["a(b|c)"])
+        self.assertEqual(prune(["a", "b"]), ["a", "b"])
+
+    def test_prune_union(self):
+        self.assertEqual(prune(["ab|c", "ac|d", "a(b|c)"]), ["ab|c", "ac|d"])
+        with patch.object(import_module("regexp.compile"), "MAX_UNION_PRODUCT", 1):
+            self.assertEqual(prune(["ab|c", "ac|d", "a(b|c)"]), ["ab|c", "ac|d", "a(b|c)"])
+
+
+class TestSimplify(unittest.TestCase):
+    def test_stats(self):
+        nfa = NFA.from_pattern("abc|abd|abe", 0)
+        stats = []
+        simplified = nfa.simplify(stats)
+        self.assertEqual([name for name, _, _ in stats], [
+            "input", "remove_epsilons", "prune_dead", "factor_prefixes", "merge_equivalent"])
+        self.assertEqual(stats[0][1], len(nfa.nodes))
+        self.assertEqual(stats[-1][1], len(simplified.nodes))
+        # ab(c|d|e): 3 nodes for the prefix and a single final node
+        self.assertEqual(len(simplified.nodes), 4)
+        self.assertTrue(all(not node.epsilons for node in simplified.nodes))
+
+    def test_same_language(self):
+        for pattern in ("abc|abd|xbc", "(ab|ac)*a", "(a|ε)(b|Σ)*c", "a(b|c)*|ab*", "ε", "(a*)*"):
+            nfa = NFA.from_pattern(pattern, 0)
+            simplified = nfa.simplify()
+            for length in range(4):
+                for chars in product("abcx", repeat=length):
+                    string = "".join(chars)
+                    self.assertEqual(simplified.match(string), nfa.match(string), (pattern, string))
+
+    def test_copy(self):
+        nfa = NFA.from_pattern("abc|abd", 0)
+        before = len(nfa.nodes)
+        nfa.simplify()
+        self.assertEqual(len(nfa._number_nodes()), before)
+
+
+class TestLexer(unittest.TestCase):
+    lexer = Lexer([
+        ("IF", "if"),
+        ("NAME", "[a-z][a-z0-9]*"),
+        ("NUMBER", "\\d\\d*"),
+        ("OP", "=|==|<|<="),
+        (None, "  *"),
+    ])
+
+    def tokens(self, string):
+        return [(name, string[start:end]) for name, start, end in self.lexer.tokenize(string)]
+
+    def test_longest_match(self):
+        self.assertEqual(self.tokens("iffy<=12"), [
+            ("NAME", "iffy"), ("OP", "<="), ("NUMBER", "12")])
+
+    def test_priority(self):
+        self.assertEqual(self.tokens("if x == 1"), [
+            ("IF", "if"), ("NAME", "x"), ("OP", "=="), ("NUMBER", "1")])
+
+    def test_offsets(self):
+        self.assertEqual(list(self.lexer.tokenize("a =b")), [
+            ("NAME", 0, 1), ("OP", 2, 3), ("NAME", 3, 4)])
+
+    def test_error(self):
+        with self.assertRaises(LexingError) as context:
+            list(self.lexer.tokenize("x = $"))
+        self.assertEqual(context.exception.index, 4)
+
+    def test_ignore_case(self):
+        lexer = Lexer([("IF", "if"), ("NAME", "[a-z][a-z]*")], IGNORE_CASE)
+        self.assertEqual(list(lexer.tokenize("IF")), [("IF", 0, 2)])
+
+
+class TestProfiling(unittest.TestCase):
+    def test_counters(self):
+        auto = DCMFA.from_pattern("ab*c", 0)
+        profile = auto.start_profiling()
+        self.assertTrue(auto.match("abbc"))
+        self.assertEqual(auto.read_greedy("abx"), 0)
+        self.assertEqual(profile.calls, 2)
+        self.assertEqual(profile.chars, 7)
+        self.assertEqual(profile.fallbacks, 1)
+        self.assertEqual(profile.histogram()[0], (auto.nodes[1].id, 5))
+        self.assertEqual(profile.export()["visits"][auto.initial_node.id], 2)
+
+    def test_stop(self):
+        auto = DCMFA.from_pattern("ab*c", 0)
+        profile = auto.start_profiling()
+        self.assertIs(auto.stop_profiling(), profile)
+        self.assertTrue(auto.match("abc"))
+        self.assertEqual(profile.calls, 0)
+        self.assertNotIn("match", vars(auto))
+
+    def test_interned_copy(self):
+        auto = copy(compile("(a|b)*"))
+        profile = auto.start_profiling()
+        self.assertTrue(compile("(b|a)*").match("ab"))
+        self.assertEqual(profile.calls, 0)
+        self.assertTrue(auto.match("ab"))
+        self.assertEqual(profile.calls, 1)
+
+    def test_mesh(self):
+        auto = DCMFA.from_pattern("ab", 0)
+        profile = auto.start_profiling()
+        auto.match("ab")
+        output = StringIO()
+        with redirect_stdout(output):
+            auto.print_mesh(profile)
+        self.assertIn("1 33.3% (0) a (1)", output.getvalue())
+
+
+class TestWorkload(unittest.TestCase):
+    def setUp(self):
+        self.auto = DCMFA.from_pattern("(a|b)*c", 0)
+        self.workload = Workload(self.auto, random=Random(0))
+
+    def test_count(self):
+        self.assertEqual([self.workload.count(n) for n in range(6)], [0, 1, 2, 4, 8, 16])
+        self.assertEqual(Workload(DCMFA.from_pattern("a.b", 0)).count(3), 3)
+
+    def test_shortlex(self):
+        self.assertEqual(list(islice(self.workload.shortlex(), 4)), ["c", "ac", "bc", "aac"])
+        self.assertEqual(list(Workload(NFA.from_pattern("ab|a|abc", 0)).shortlex()),
+                         ["a", "ab", "abc"])
+        self.assertEqual(list(self.workload.shortlex(2)), ["c", "ac", "bc"])
+
+    def test_sample(self):
+        for _ in range(20):
+            string = self.workload.sample(4)
+            self.assertEqual(len(string), 4)
+            self.assertTrue(self.auto.match(string))
+        with self.assertRaises(ValueError):
+            self.workload.sample(0)
+
+    def test_ignore_case(self):
+        auto = DCMFA.from_pattern("(x|y|z|q|j|k|w|v)Σ", IGNORE_CASE)
+        workload = Workload(auto)
+        self.assertNotIn("X", workload.alphabet)
+        self.assertEqual(workload.count(2), sum(
+            auto.match("".join(chars)) for chars in product(workload.alphabet, repeat=2)))
+        workload = Workload(auto, alphabet="XYa")
+        self.assertEqual(workload.alphabet, ["a", "x", "y"])
+        self.assertTrue(workload.accepts("Xa"))
+
+    def test_near_misses(self):
+        misses = self.workload.near_misses(4, 10)
+        self.assertEqual(len(misses), 10)
+        for string in misses:
+            self.assertFalse(self.auto.match(string))
+        self.assertEqual(Workload(DCMFA.from_pattern(".*", 0)).near_misses(2, 3), [])
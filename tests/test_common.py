@@ -2,13 +2,20 @@
 
 import unittest
 import re
+import subprocess
+import sys
 from collections import Counter
 from contextlib import closing, redirect_stdout
 from io import StringIO
+from os import makedirs
+from os.path import join
+from tempfile import TemporaryDirectory
 from textwrap import dedent
 
 from regexp import compile
-from regexp.nodes import Node
+from regexp.files import CHUNKED, compression, is_binary, open_text, scan_path, walk
+from regexp.parallel import scan_file
+from regexp.nodes import NDN, Node
 
 class CommonTest(unittest.TestCase):
     def test_print_mesh(self):
@@ -31,6 +38,18 @@ class CommonTest(unittest.TestCase):
                 "(x) c (x) -->"])
             self.assertEqual(buffer_lines, testcase_lines)
 
+    def test_print_mesh_order(self):
+        automaton = compile("abcdefghijklm")
+
+        with closing(StringIO()) as buffer:
+            with redirect_stdout(buffer):
+                automaton.print_mesh()
+            sources = [int(line[1:line.index(")")])
+                       for line in buffer.getvalue().splitlines()
+                       if line.startswith("(") and not line.endswith("-->")]
+            self.assertGreater(max(sources), 10)
+            self.assertEqual(sources, sorted(sources))
+
     def test_print_transitions(self):
         automaton = compile("ab*c")
 
@@ -42,3 +61,135 @@ class CommonTest(unittest.TestCase):
             buffer_lines = Counter(unspaced.splitlines())
             testcase_lines = Counter(["(x) a (x)", "(x) Σ (x)"])
             self.assertEqual(buffer_lines, testcase_lines)
+
+    def test_dense_ids(self):
+        for pattern in ("ab*c", "(a|b)*c"):
+            automaton = compile(pattern)
+            self.assertEqual(automaton.initial_node.id, 0)
+            self.assertEqual([node.id for node in automaton.nodes],
+                             list(range(len(automaton.nodes))))
+
+    def test_nodes_have_no_dict(self):
+        automaton = compile("ab*c")
+        for node in automaton.nodes:
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_ndn_targets(self):
+        node, first, second = NDN(), NDN(), NDN()
+        for target in (second, first, second):
+            node.add("a", target)
+            node.add("", target)
+        self.assertEqual(list(node.read("a")), [second, first])
+        self.assertEqual(list(node.read("")), [second, first])
+        self.assertEqual(list(node.read("b")), [])
+
+    def test_lazy_import(self):
+        code = ("import sys, regexp; "
+                "assert 'regexp.automatons' not in sys.modules; "
+                "assert callable(regexp.compile)")
+        subprocess.run([sys.executable, "-c", code], check=True)
+        code = ("import sys, regexp; regexp.compile('ab*c'); "
+                "assert not {'regexp.fuzzy', 'regexp.parallel', 'regexp.profiling'} & set(sys.modules)")
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_star_import(self):
+        namespace = {}
+        exec("from regexp import *", namespace)
+        self.assertTrue(callable(namespace["compile"]))
+        self.assertIn("IGNORE_CASE", namespace)
+        self.assertNotIn("sys", namespace)
+
+    def test_compile_not_shadowed(self):
+        code = ("import regexp.patternset, regexp; "
+                "assert callable(regexp.compile)")
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_compressed_files(self):
+        import bz2, gzip, lzma
+        text = "foo\nbar\nfoo bar\n"
+        with TemporaryDirectory() as directory:
+            paths = []
+            for module in (gzip, bz2, lzma, None):
+                path = join(directory, "log.{}".format(module.__name__ if module else "txt"))
+                with (module.open(path, "wt") if module else open(path, "w")) as fd:
+                    fd.write(text)
+                self.assertEqual(compression(path), module and module.__name__)
+                with open_text(path) as fd:
+                    self.assertEqual(fd.read(), text)
+                paths.append(path)
+
+            for jobs in ([], ["-j", "2"]):
+                result = subprocess.run(
+                    [sys.executable, "-m", "regexp", "-c", *jobs, "bar", *paths],
+                    check=True, stdout=subprocess.PIPE, universal_newlines=True)
+                self.assertEqual(result.stdout, "".join(
+                    "{}:2\n".format(path) for path in paths))
+
+    def test_corrupt_file(self):
+        import gzip
+        with TemporaryDirectory() as directory:
+            paths = [join(directory, name) for name in ("a.txt", "b.gz", "c.txt")]
+            for path in paths[::2]:
+                with open(path, "w") as fd:
+                    fd.write("foo\n")
+            with open(paths[1], "wb") as fd:
+                fd.write(gzip.compress(b"foo\n" * 100)[:-12])
+
+            for jobs in ([], ["-j", "2"]):
+                result = subprocess.run(
+                    [sys.executable, "-m", "regexp", *jobs, "foo", *paths],
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+                self.assertEqual(result.returncode, 2)
+                self.assertEqual(result.stdout, "foo\nfoo\n")
+                self.assertTrue(result.stderr.startswith("regexp: {}: ".format(paths[1])))
+
+    def test_scan_path_chunked(self):
+        from concurrent.futures import ProcessPoolExecutor
+        import gzip
+        text = "foo\nbar\n" * 10
+        automaton = compile("Σ*fooΣ*")
+        with TemporaryDirectory() as directory:
+            plain = join(directory, "a.log")
+            with open(plain, "w") as fd:
+                fd.write(text)
+            compressed = join(directory, "a.log.gz")
+            with gzip.open(compressed, "wt") as fd:
+                fd.write(text)
+
+            arguments = (automaton.__class__, automaton.to_table(), 0)
+            self.assertEqual(scan_path(*arguments, plain, 2), ["foo", "foo"])
+            self.assertEqual(scan_path(*arguments, plain, None, 16), CHUNKED)
+            self.assertEqual(scan_path(*arguments, compressed, None, 16), ["foo"] * 10)
+            with ProcessPoolExecutor(2) as executor:
+                lines = scan_file(automaton, plain, 2, size=16, executor=executor)
+                self.assertEqual(list(lines), ["foo"] * 10)
+
+    def test_recursive(self):
+        with TemporaryDirectory() as directory:
+            makedirs(join(directory, "sub", "deep"))
+            contents = {
+                "a.log": "foo\n",
+                "b.txt": "foo\nfoo\n",
+                join("sub", "c.log"): "bar\n",
+                join("sub", "deep", "d.log"): "foo bar\n",
+                join("sub", "e.bin"): "foo\0\n",
+            }
+            for name, text in contents.items():
+                with open(join(directory, name), "w") as fd:
+                    fd.write(text)
+
+            self.assertEqual(list(walk([directory])), [])
+            self.assertEqual(
+                list(walk([directory], recursive=True, include=["*.log"], exclude=["c.*"])),
+                [join(directory, "a.log"), join(directory, "sub", "deep", "d.log")])
+            self.assertTrue(is_binary(join(directory, "sub", "e.bin")))
+            self.assertFalse(is_binary(join(directory, "a.log")))
+
+            for jobs in ([], ["-j", "2"]):
+                result = subprocess.run(
+                    [sys.executable, "-m", "regexp", "-r", "-c", *jobs,
+                     "--exclude", "*.txt", "foo", directory],
+                    check=True, stdout=subprocess.PIPE, universal_newlines=True)
+                counts = ((["a.log"], 1), (["sub", "c.log"], 0), (["sub", "deep", "d.log"], 1))
+                self.assertEqual(result.stdout, "".join(
+                    "{}:{}\n".format(join(directory, *name), count) for name, count in counts))
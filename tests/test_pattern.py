@@ -2,13 +2,14 @@
 
 
 import unittest
+from functools import partial
 from regexp.automatons import NFA, DFA, DCFA, DCMFA
-from regexp.pattern import parse, expand, escape, IGNORE_CASE
+from regexp.pattern import parse, expand, escape, literals, IGNORE_CASE
 
 class MatchCase(unittest.TestCase):
     def assertMatch(self, pattern, matchs, nomatchs, flags=0):
         automaton = parse(pattern, flags)
-        for constructor in (NFA, DFA.from_ndfa, DCFA.from_dfa, DCMFA.from_dcfa):
+        for constructor in (partial(NFA, flags=flags), DFA.from_ndfa, DCFA.from_dfa, DCMFA.from_dcfa):
             automaton = constructor(automaton)
             for string in matchs:
                 self.assertTrue(automaton.match(string),
@@ -73,6 +74,16 @@ class TestFlags(MatchCase):
         self.assertMatch("a", ["a"], ["A"], flags=0)
         self.assertMatch("a", ["a", "A"], [], flags=IGNORE_CASE)
 
+    def test_ignore_case_unicode(self):
+        self.assertMatch(r"é\Σtra", ["ÉΣTRA", "éσtra", "Éςtra"], ["éxtra"], flags=IGNORE_CASE)
+        self.assertMatch("ÉTÉ", ["été", "ÉtÉ"], ["ete"], flags=IGNORE_CASE)
+
+    def test_ignore_case_size(self):
+        sensitive = DCMFA.from_pattern("abc", 0)
+        insensitive = DCMFA.from_pattern("abc", IGNORE_CASE)
+        self.assertEqual(len(sensitive.nodes), len(insensitive.nodes))
+        self.assertTrue(insensitive.match("aBc"))
+
 
 class TestEscapce(unittest.TestCase):
     def test_escape(self):
@@ -80,6 +91,18 @@ class TestEscapce(unittest.TestCase):
         self.assertEqual(escape("a(bΣcεd)e\\f*g"), r"a\(b\Σc\εd\)e\\f\*g")
 
 
+class TestLiterals(unittest.TestCase):
+    def test_literals(self):
+        self.assertEqual(literals("foo|bar"), ["foo", "bar"])
+        self.assertEqual(literals("(foo|bar)"), ["foo", "bar"])
+        self.assertEqual(literals(r"a\*|b\|c"), ["a*", "b|c"])
+
+    def test_not_literals(self):
+        self.assertIsNone(literals("a*|b"))
+        self.assertIsNone(literals("(a)(b)"))
+        self.assertIsNone(literals("aΣ"))
+
+
 class TestExtend(unittest.TestCase):
     def test_expend_identity(self):
         self.assertEqual(expand(r"abc123"), r"abc123")
@@ -109,3 +132,6 @@ class TestExtend(unittest.TestCase):
             r"(a|b|c|d|e|f|g|h|i|j|k|l|m|n|o|p|q|r|s|t|u|v|w|x|y|z"
             r"|A|B|C|D|E|F|G|H|I|J|K|L|M|N|O|P|Q|R|S|T|U|V|W|X|Y|Z"
             r"|0|1|2|3|4|5|6|7|8|9|_)")
+
+    def test_escape_special(self):
+        self.assertEqual(expand(r"\(a\)\*"), r"\(a\)\*")